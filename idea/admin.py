@@ -1,34 +1,13 @@
 from django.contrib import admin
+from idea.export import export_action
 from idea.models import Idea, State, Vote, Banner, Config
 
-idea_actions = []
-vote_actions = []
-banner_actions = []
-
-try:
-    from core.actions import export_as_csv_action
-
-    idea_actions.append(export_as_csv_action("CSV Export",
-                                             fields=['title',
-                                                     'creator',
-                                                     'is_anonymous',
-                                                     'banner',
-                                                     'summary',
-                                                     'text',
-                                                     'state']))
-    vote_actions.append(export_as_csv_action("CSV Export",
-                                             fields=['creator',
-                                                     'idea']))
-    banner_actions.append(export_as_csv_action("CSV Export",
-                                               fields=['title',
-                                                       'text',
-                                                       'slug',
-                                                       'is_private',
-                                                       'is_votes',
-                                                       'start_date',
-                                                       'end_date']))
-except ImportError:
-    pass
+idea_actions = [export_action('ideas', 'csv'),
+                export_action('ideas', 'jsonl')]
+vote_actions = [export_action('votes', 'csv'),
+                export_action('votes', 'jsonl')]
+banner_actions = [export_action('banners', 'csv'),
+                  export_action('banners', 'jsonl')]
 
 class ConfigAdmin(admin.ModelAdmin):
     list_display = ('key', 'value')
@@ -0,0 +1,263 @@
+"""
+Read-only JSON API over ideas, their votes, banners and tags.
+
+Lists are paged by keyset (see CursorPaginator): a response carries the
+page's results and the cursor of the next page, to be passed back as
+?cursor=.  ?fields= picks the fields to return, as a comma-separated list.
+Only the columns those fields need are read, and related tables are only
+joined for the fields that come from them.
+
+The API shows what the views show: private banners (rooms) and the ideas
+in them are left out, and ideas are listed by state (?state=active, the
+default, or ?state=archived).
+"""
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth.decorators import login_required
+from django.core.serializers.json import DjangoJSONEncoder
+from django.core.urlresolvers import reverse
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+from idea.models import Banner, Idea, Vote
+from idea.utility import state_helper, tag_helper
+from idea.utility.pagination import CursorPaginator, InvalidCursor
+
+if 'core.taggit' in settings.INSTALLED_APPS:
+    from core.taggit.models import Tag
+else:
+    from taggit.models import Tag
+
+MAX_PER_PAGE = 500
+
+#   ?state= values and the names of the states they list
+IDEA_STATES = {'active': 'Active', 'archived': 'Archive'}
+
+
+class BadRequest(Exception):
+    pass
+
+
+def _column(name):
+    return ((name,), lambda row: row[name])
+
+
+def _idea_creator(row):
+    if row['is_anonymous']:
+        return None
+    return row['creator__username']
+
+
+#   Each field maps to the columns it is read from and a function building
+#   its value from a row holding those columns.
+IDEA_FIELDS = {
+    'id': _column('id'),
+    'title': _column('title'),
+    'summary': _column('summary'),
+    'text': _column('text'),
+    'time': _column('time'),
+    'last_activity_at': _column('last_activity_at'),
+    'vote_count': _column('vote_count'),
+    'comment_count': _column('comment_count'),
+    'trending_score': _column('trending_score'),
+    'state': _column('state__name'),
+    'banner': _column('banner'),
+    'creator': (('creator__username', 'is_anonymous'), _idea_creator),
+    'url': (('id',),
+            lambda row: reverse('idea:idea_detail', args=(row['id'],))),
+    #   Read for the whole page at once, see _add_tags
+    'tags': (('id',), None),
+}
+IDEA_DEFAULT_FIELDS = ('id', 'title', 'summary', 'time', 'vote_count',
+                       'comment_count', 'state', 'banner', 'url')
+IDEA_ORDERINGS = {
+    'id': ('-id',),
+    'recent': ('-time', '-id'),
+    'vote': ('-vote_count', '-id'),
+}
+
+VOTE_FIELDS = {
+    'id': _column('id'),
+    'idea': _column('idea'),
+    'creator': _column('creator__username'),
+    'time': _column('time'),
+}
+VOTE_DEFAULT_FIELDS = ('creator', 'time')
+
+BANNER_FIELDS = {
+    'id': _column('id'),
+    'title': _column('title'),
+    'text': _column('text'),
+    'start_date': _column('start_date'),
+    'end_date': _column('end_date'),
+    'is_votes': _column('is_votes'),
+    'url': (('id',),
+            lambda row: reverse('idea:challenge_detail', args=(row['id'],))),
+}
+BANNER_DEFAULT_FIELDS = ('id', 'title', 'start_date', 'end_date', 'url')
+
+
+def api_view(view):
+    """
+    Serve view's return value as JSON to logged in users, answering a
+    BadRequest with a 400 and its message.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data, status = view(request, *args, **kwargs), 200
+        except BadRequest as e:
+            data, status = {'error': unicode(e)}, 400
+        return HttpResponse(json.dumps(data, cls=DjangoJSONEncoder),
+                            content_type='application/json', status=status)
+    return login_required(require_GET(wrapper))
+
+
+def _fields(request, spec, default):
+    """ The fields requested with ?fields=, or default. """
+    requested = request.GET.get('fields')
+    if not requested:
+        return default
+    fields = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in spec]
+    if unknown:
+        raise BadRequest('Unknown fields: %s' % ', '.join(unknown))
+    return fields
+
+
+def _columns(spec, fields, ordering=()):
+    columns = set(name.lstrip('-') for name in ordering)
+    for name in fields:
+        columns.update(spec[name][0])
+    return columns
+
+
+def _serialize(row, spec, fields):
+    return dict((name, spec[name][1](row)) for name in fields
+                if spec[name][1] is not None)
+
+
+def _page(request, queryset, spec, fields, ordering):
+    """
+    Return the requested page of queryset as a dict of serialized results
+    and the next cursor.
+    """
+    try:
+        per_page = min(int(request.GET.get(
+            'per_page', getattr(settings, 'IDEA_API_PER_PAGE', 50))),
+            MAX_PER_PAGE)
+    except ValueError:
+        raise BadRequest('per_page must be a number')
+    if per_page < 1:
+        raise BadRequest('per_page must be positive')
+
+    paginator = CursorPaginator(
+        queryset.values(*_columns(spec, fields, ordering)), ordering,
+        per_page)
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        raise BadRequest('Invalid cursor')
+    results = [_serialize(row, spec, fields) for row in page]
+    return page, {'results': results, 'next_cursor': page.next_cursor}
+
+
+def _add_tags(rows, results):
+    names = tag_helper.get_tag_names([row['id'] for row in rows])
+    for row, result in zip(rows, results):
+        result['tags'] = names[row['id']]
+
+
+def _visible_ideas():
+    return Idea.objects.exclude(banner__is_private=True)
+
+
+def _state_name(request):
+    state = request.GET.get('state', 'active')
+    if state not in IDEA_STATES:
+        raise BadRequest('state must be one of: %s' %
+                         ', '.join(sorted(IDEA_STATES)))
+    return state
+
+
+@api_view
+def ideas(request):
+    """
+    Ideas in a state, newest first.  ?banner=<id> and ?tags=<slug>,...
+    narrow the list down; ?sort=recent or ?sort=vote order it by time or
+    by number of likes instead.
+    """
+    fields = _fields(request, IDEA_FIELDS, IDEA_DEFAULT_FIELDS)
+    ordering = IDEA_ORDERINGS.get(request.GET.get('sort', 'id'))
+    if ordering is None:
+        raise BadRequest('sort must be one of: %s' %
+                         ', '.join(sorted(IDEA_ORDERINGS)))
+
+    state = state_helper.get_state(IDEA_STATES[_state_name(request)])
+    queryset = _visible_ideas().filter(state=state)
+    if request.GET.get('banner'):
+        try:
+            queryset = queryset.filter(banner=int(request.GET['banner']))
+        except ValueError:
+            raise BadRequest('banner must be an id')
+    tag_slugs = set([slug for slug in request.GET.get('tags', '').split(',')
+                     if slug])
+    if tag_slugs:
+        tag_ids = [tag_id for tag_id in Tag.objects.filter(
+            slug__in=tag_slugs).values_list('id', flat=True)]
+        if len(tag_ids) < len(tag_slugs):
+            queryset = queryset.none()
+        else:
+            queryset = tag_helper.filter_ideas(queryset, tag_ids)
+
+    page, data = _page(request, queryset, IDEA_FIELDS, fields, ordering)
+    if 'tags' in fields:
+        _add_tags(page.object_list, data['results'])
+    return data
+
+
+@api_view
+def idea(request, idea_id):
+    """ A single idea; idea_id must be a string containing an int. """
+    fields = _fields(request, IDEA_FIELDS, IDEA_DEFAULT_FIELDS)
+    rows = [row for row in _visible_ideas().filter(pk=int(idea_id)).values(
+        *_columns(IDEA_FIELDS, fields))]
+    if not rows:
+        raise Http404
+    result = _serialize(rows[0], IDEA_FIELDS, fields)
+    if 'tags' in fields:
+        _add_tags(rows, [result])
+    return result
+
+
+@api_view
+def idea_votes(request, idea_id):
+    """ The likes of an idea, most recent first. """
+    if not _visible_ideas().filter(pk=int(idea_id)).exists():
+        raise Http404
+    fields = _fields(request, VOTE_FIELDS, VOTE_DEFAULT_FIELDS)
+    page, data = _page(request, Vote.objects.filter(idea=int(idea_id)),
+                       VOTE_FIELDS, fields, ('-time', '-id'))
+    return data
+
+
+@api_view
+def banners(request):
+    """ Public banners (challenges), newest first. """
+    fields = _fields(request, BANNER_FIELDS, BANNER_DEFAULT_FIELDS)
+    page, data = _page(request, Banner.objects.exclude(is_private=True),
+                       BANNER_FIELDS, fields, ('-id',))
+    return data
+
+
+@api_view
+def tags(request):
+    """ The most used tags among the ideas in a state, with their counts. """
+    state_name = _state_name(request)
+    ideas = _visible_ideas().filter(
+        state=state_helper.get_state(IDEA_STATES[state_name]))
+    return {'results': [
+        {'name': tag.name, 'slug': tag.slug, 'count': tag.count}
+        for tag in tag_helper.get_tag_cloud(ideas, state_name)]}
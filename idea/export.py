@@ -0,0 +1,145 @@
+"""
+Streaming exports of ideas, votes, banners and comments as CSV or JSON Lines.
+
+Rows are read a chunk at a time, by primary key (each chunk picks up after
+the last key of the previous one), and written out as they are read, so an
+export takes the same memory however many rows it covers.  Used by the
+export_ideas management command and the admin export actions.
+"""
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+from core.custom_comments.models import MPTTComment
+from idea.models import Banner, Idea, Vote
+
+FORMATS = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+#   The columns of each export, as (heading, field) pairs
+COLUMNS = {
+    'ideas': [
+        ('id', 'id'),
+        ('title', 'title'),
+        ('creator', 'creator__username'),
+        ('is_anonymous', 'is_anonymous'),
+        ('banner', 'banner'),
+        ('summary', 'summary'),
+        ('text', 'text'),
+        ('state', 'state__name'),
+        ('time', 'time'),
+        ('vote_count', 'vote_count'),
+        ('comment_count', 'comment_count'),
+    ],
+    'votes': [
+        ('id', 'id'),
+        ('idea', 'idea'),
+        ('creator', 'creator__username'),
+        ('time', 'time'),
+    ],
+    'banners': [
+        ('id', 'id'),
+        ('title', 'title'),
+        ('text', 'text'),
+        ('slug', 'slug'),
+        ('is_private', 'is_private'),
+        ('is_votes', 'is_votes'),
+        ('start_date', 'start_date'),
+        ('end_date', 'end_date'),
+    ],
+    'comments': [
+        ('id', 'id'),
+        ('idea', 'object_pk'),
+        ('user', 'user__username'),
+        ('is_anonymous', 'is_anonymous'),
+        ('comment', 'comment'),
+        ('submit_date', 'submit_date'),
+        ('is_public', 'is_public'),
+        ('is_removed', 'is_removed'),
+    ],
+}
+
+
+def default_queryset(kind):
+    """ Everything there is to export of kind. """
+    if kind == 'ideas':
+        return Idea.objects.all()
+    elif kind == 'votes':
+        return Vote.objects.all()
+    elif kind == 'banners':
+        return Banner.objects.all()
+    return MPTTComment.objects.for_model(Idea)
+
+
+def iter_rows(queryset, fields, chunk_size=1000):
+    """
+    Yield a tuple of the given fields for every row of queryset, in primary
+    key order, reading chunk_size rows at a time.
+    """
+    queryset = queryset.order_by('pk')
+    last = None
+    while True:
+        chunk = queryset if last is None else queryset.filter(pk__gt=last)
+        count = 0
+        for row in chunk.values_list('pk', *fields)[:chunk_size].iterator():
+            last = row[0]
+            count += 1
+            yield row[1:]
+        if count < chunk_size:
+            return
+
+
+class _Echo(object):
+    """ A file-like object handing back whatever the csv writer writes. """
+    def write(self, value):
+        return value
+
+
+def _encode(value):
+    if isinstance(value, unicode):
+        return value.encode('utf-8')
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+def export_lines(kind, format='csv', queryset=None, chunk_size=1000):
+    """
+    Yield the export of kind (a key of COLUMNS) in format (a key of
+    FORMATS) a line at a time, as UTF-8.  A CSV export starts with a line
+    of headings.  queryset restricts the export to some of the rows.
+    """
+    if queryset is None:
+        queryset = default_queryset(kind)
+    headings = [heading for heading, field in COLUMNS[kind]]
+    fields = [field for heading, field in COLUMNS[kind]]
+    rows = iter_rows(queryset, fields, chunk_size)
+
+    if format == 'csv':
+        writer = csv.writer(_Echo())
+        yield writer.writerow(headings)
+        for row in rows:
+            yield writer.writerow([_encode(value) for value in row])
+    else:
+        for row in rows:
+            yield json.dumps(dict(zip(headings, row)),
+                             cls=DjangoJSONEncoder) + '\n'
+
+
+def export_response(kind, format='csv', queryset=None):
+    """ A response streaming the export of kind as a file download. """
+    response = StreamingHttpResponse(
+        export_lines(kind, format, queryset), content_type=FORMATS[format])
+    response['Content-Disposition'] = \
+        'attachment; filename=%s.%s' % (kind, format)
+    return response
+
+
+def export_action(kind, format='csv'):
+    """ An admin action streaming the export of the selected rows. """
+    def export(modeladmin, request, queryset):
+        return export_response(kind, format, queryset)
+    export.short_description = '%s Export' % format.upper()
+    export.__name__ = 'export_%s' % format
+    return export
@@ -0,0 +1,31 @@
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+from idea.export import COLUMNS, FORMATS, export_lines
+
+
+class Command(BaseCommand):
+    args = '<%s>' % '|'.join(sorted(COLUMNS))
+    help = ("Export all ideas, votes, banners or comments as CSV or JSON "
+            "Lines, streaming them so any number of rows fits in memory.")
+    option_list = BaseCommand.option_list + (
+        make_option('--format', default='csv', choices=sorted(FORMATS),
+                    help='Output format: csv (default) or jsonl.'),
+        make_option('--output', default=None,
+                    help='File to write to instead of standard output.'),
+        make_option('--chunk-size', type='int', default=1000,
+                    help='Number of rows to read at a time.'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1 or args[0] not in COLUMNS:
+            raise CommandError('Usage: export_ideas %s' % self.args)
+        lines = export_lines(args[0], options['format'],
+                             chunk_size=options['chunk_size'])
+        if options['output']:
+            with open(options['output'], 'wb') as output:
+                for line in lines:
+                    output.write(line)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
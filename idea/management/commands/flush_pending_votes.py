@@ -0,0 +1,17 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from idea import vote_buffer
+
+
+class Command(NoArgsCommand):
+    help = ("Apply the likes buffered while IDEA_BUFFER_VOTES is on.  Run "
+            "frequently (e.g. from cron every minute).")
+    option_list = NoArgsCommand.option_list + (
+        make_option('--batch-size', type='int', default=1000,
+                    help='Number of buffered votes to apply at a time.'),
+    )
+
+    def handle_noargs(self, **options):
+        flushed = vote_buffer.flush(options['batch_size'])
+        self.stdout.write("Applied %d buffered votes" % flushed)
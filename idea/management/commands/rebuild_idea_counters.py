@@ -0,0 +1,11 @@
+from django.core.management.base import NoArgsCommand
+from idea.models import Idea
+
+
+class Command(NoArgsCommand):
+    help = ("Recompute the denormalized vote_count, comment_count and "
+            "last_activity_at columns of every Idea.")
+
+    def handle_noargs(self, **options):
+        updated = Idea.objects.refresh_counters()
+        self.stdout.write("Rebuilt counters for %d ideas" % updated)
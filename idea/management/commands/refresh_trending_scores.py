@@ -0,0 +1,12 @@
+from django.core.management.base import NoArgsCommand
+from idea.models import Idea
+
+
+class Command(NoArgsCommand):
+    help = ("Recompute the time-decayed trending_score of every active "
+            "Idea.  Run periodically (e.g. from cron) to keep the trending "
+            "list current.")
+
+    def handle_noargs(self, **options):
+        scored = Idea.objects.refresh_trending_scores()
+        self.stdout.write("Scored %d trending ideas" % scored)
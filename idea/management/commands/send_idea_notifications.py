@@ -0,0 +1,18 @@
+from optparse import make_option
+
+from django.core.management.base import NoArgsCommand
+from idea.notifications import send_pending
+
+
+class Command(NoArgsCommand):
+    help = ("Deliver the comment notifications queued while "
+            "IDEA_QUEUE_NOTIFICATIONS is on.  Run periodically (e.g. from "
+            "cron).")
+    option_list = NoArgsCommand.option_list + (
+        make_option('--batch-size', type='int', default=200,
+                    help='Number of queued notifications to read at a time.'),
+    )
+
+    def handle_noargs(self, **options):
+        sent = send_pending(options['batch_size'])
+        self.stdout.write("Sent %d idea notifications" % sent)
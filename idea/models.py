@@ -1,18 +1,29 @@
-from datetime import datetime
+import math
+import re
+from datetime import date, datetime, timedelta
 from django.contrib.auth.models import SiteProfileNotAvailable
 from django.conf import settings
 from core.custom_comments.models import MPTTComment
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.urlresolvers import reverse
-from django.db import models
+from django.db import IntegrityError, connection, models, transaction
+from django.db.models import Count, F, Max, Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.timezone import get_default_timezone
 from django.utils.translation import ugettext_lazy
 
+from idea.utility import config_helper, versions
+
 if 'core.taggit' in settings.INSTALLED_APPS:
     from core.taggit.managers import TaggableManager
+    from core.taggit.models import TaggedItem
 else:
     from taggit.managers import TaggableManager
+    from taggit.models import TaggedItem
 
 
 def unique_slug(item, slug_source, slug_field):
@@ -22,35 +33,100 @@ def unique_slug(item, slug_source, slug_field):
 
     The item's slug field is first prepopulated by slugify-ing the source
     field. If that value already exists, a counter is appended to the slug,
-    and the counter incremented upward until the value is unique.
+    one higher than the highest counter already in use.
 
-    For instance, if you save an object titled Daily Roundup, and the slug
-    daily-roundup is already taken, this function will try daily-roundup-2,
-    daily-roundup-3, daily-roundup-4, etc, until a unique value is found.
+    For instance, if you save an object titled Daily Roundup, and the slugs
+    daily-roundup and daily-roundup-2 are already taken, this function will
+    use daily-roundup-3.  Only the slugs starting with daily-roundup are
+    fetched, so the unique index on the slug field does the work.  A source
+    with nothing to slugify (punctuation only, say) is slugged after the
+    model instead: banner, banner-2, and so on.
 
     Call from within a model's custom save() method like so:
     unique_slug(item, slug_source='field1', slug_field='field2')
     where the value of field slug_source will be used to prepopulate the value
-    of slug_field.
+    of slug_field.  See save_with_unique_slug for saving while other
+    processes may be taking slugs at the same time.
     """
     if not getattr(item, slug_field):  # if it already has slug, do nothing.
         from django.template.defaultfilters import slugify
-        slug = slugify(getattr(item, slug_source))
         itemModel = item.__class__
-        # the following gets all existing slug values
-        allSlugs = [sl.values()[0]
-                    for sl in itemModel.objects.values(slug_field)]
-        if slug in allSlugs:
-            import re
-            counterFinder = re.compile(r'-\d+$')
-            counter = 2
-            slug = "%s-%i" % (slug, counter)
-            while slug in allSlugs:
-                slug = re.sub(counterFinder, "-%i" % counter, slug)
-                counter += 1
+        slug = slugify(getattr(item, slug_source)) or \
+            itemModel._meta.object_name.lower()
+        # only the slug itself and its numbered variants can collide
+        counterFinder = re.compile(r'^%s(?:-(\d+))?$' % re.escape(slug))
+        counters = []
+        for existing in itemModel._default_manager.filter(
+                **{'%s__startswith' % slug_field: slug}
+        ).values_list(slug_field, flat=True):
+            match = counterFinder.match(existing)
+            if match:
+                counters.append(int(match.group(1) or 1))
+        if 1 in counters:
+            slug = "%s-%i" % (slug, max(counters) + 1)
         setattr(item, slug_field, slug)
 
 
+def save_with_unique_slug(item, slug_source, slug_field, save, attempts=5):
+    """
+    Call save() after filling in the item's slug with unique_slug.  If
+    another process takes the same slug first, the insert fails on the
+    unique index; the save is then rolled back to a savepoint and retried
+    with a fresh slug.
+
+    Inside the caller's managed transaction only savepoints are used, so
+    the caller's work is left for it to commit.  Otherwise each attempt
+    runs in a managed transaction of its own, so that save() does not
+    commit on its own and the savepoint is still there to roll back to.
+    """
+    if getattr(item, slug_field):
+        return save()
+
+    def save_or_roll_back(last):
+        sid = transaction.savepoint()
+        try:
+            result = save()
+        except IntegrityError:
+            transaction.savepoint_rollback(sid)
+            if last:
+                raise
+            return False, None
+        transaction.savepoint_commit(sid)
+        return True, result
+    if not transaction.is_managed():
+        save_or_roll_back = transaction.commit_on_success(save_or_roll_back)
+
+    for attempt in range(attempts):
+        unique_slug(item, slug_source, slug_field)
+        saved, result = save_or_roll_back(attempt == attempts - 1)
+        if saved:
+            return result
+        setattr(item, slug_field, '')
+
+
+def _seconds(delta):
+    return delta.days * 86400 + delta.seconds
+
+
+def _trending_decay_rate():
+    half_life = getattr(settings, 'IDEA_TRENDING_HALF_LIFE', 48)
+    return math.log(2) / (half_life * 3600.0)
+
+
+def _trending_weight(weight, time, reference):
+    if reference is None:
+        return 0.0
+    return weight * math.exp(
+        _trending_decay_rate() * _seconds(time - reference))
+
+
+def _trending_horizon():
+    """ How far back activity counts towards the trending scores. """
+    half_life = getattr(settings, 'IDEA_TRENDING_HALF_LIFE', 48)
+    horizon = getattr(settings, 'IDEA_TRENDING_HORIZON', 10)
+    return timedelta(hours=half_life * horizon)
+
+
 class UserTrackable(models.Model):
     creator = models.ForeignKey(settings.AUTH_USER_MODEL)
     #   use a lambda so that this is evaluated upon creation (rather than
@@ -62,6 +138,42 @@ class UserTrackable(models.Model):
         abstract = True
 
 
+class BannerManager(models.Manager):
+
+    def current(self, additional_ids_list=None):
+        """
+        Public banners running today (plus any in additional_ids_list),
+        those with no end date last.
+        """
+        start_date = Q(start_date__lte=date.today())
+        end_date = Q(end_date__gte=date.today())|Q(end_date__isnull=True)
+        banner_filter = (start_date&end_date)
+        if additional_ids_list:
+            banner_filter = banner_filter|Q(id__in=additional_ids_list)
+        banners = self.exclude(is_private=True).filter(banner_filter)
+        # Banners with null end_date should be at the end
+        banners = banners.extra(select={'null_end_date': 'CASE WHEN idea_banner.end_date IS NULL THEN 0 ELSE 1 END'})
+        banners = banners.order_by('-null_end_date', 'end_date')
+        return banners
+
+    def current_list(self):
+        """
+        Today's current banners as a list, cached until a banner changes.
+        The cache key carries the date, so the set rolls over at midnight
+        without anyone having to touch it.
+        """
+        if not versions.shared():
+            return [banner for banner in self.current()]
+        key = versions.key(
+            'idea:current_banners:%s' % date.today().isoformat(),
+            versions.BANNERS)
+        banners = cache.get(key)
+        if banners is None:
+            banners = [banner for banner in self.current()]
+            cache.set(key, banners, 60 * 60 * 24)
+        return banners
+
+
 class Banner(models.Model):
 
     """ The banner text at the beginning of IdeaBox pages, asking the question.
@@ -79,9 +191,12 @@ class Banner(models.Model):
     is_private = models.BooleanField('private room', default=False)
     is_votes = models.BooleanField('voting enabled', default=True)
 
+    objects = BannerManager()
+
     def save(self, *args, **kwargs):
-        unique_slug(self, 'title', 'slug')
-        super(Banner, self).save(*args, **kwargs)
+        save_with_unique_slug(
+            self, 'title', 'slug',
+            lambda: super(Banner, self).save(*args, **kwargs))
 
     def __unicode__(self):
         if self.end_date:
@@ -112,28 +227,194 @@ class State(models.Model):
 class IdeaManager(models.Manager):
 
     def related_with_counts(self):
-        idea_type = ContentType.objects.get(app_label="idea", model="idea")
-        return self.select_related().extra(select={
-            'comment_count': """
-                SELECT count(*) FROM django_comments
-                WHERE django_comments.content_type_id = %s
-                AND django_comments.object_pk = idea_idea.id
-            """,
-            'recent_activity': """
-                SELECT MAX(CASE WHEN COALESCE(c.time, date('2001-01-01')) >= COALESCE(b.submit_date, date('2001-01-01')) AND COALESCE(c.time, date('2001-01-01')) >= a.time THEN c.time
-                                WHEN COALESCE(b.submit_date, date('2001-01-01')) >= a.time THEN b.submit_date
-                                ELSE a.time
-                           END)
-                FROM idea_idea a
-                LEFT OUTER JOIN django_comments b ON a.id = b.object_pk
-                LEFT OUTER JOIN idea_vote c ON a.id = c.idea_id
-                WHERE a.id = idea_idea.id
-            """,
-            #   Don't use annotate() as it conflicts with extra()
-            'vote_count': """
-                SELECT count(*) FROM idea_vote WHERE idea_id = idea_idea.id
-            """
-        }, select_params=[idea_type.id])
+        #   vote_count, comment_count and last_activity_at are denormalized
+        #   columns on Idea, so no extra subqueries are needed here.
+        return self.select_related()
+
+    def touch(self, idea_id, time):
+        """
+        Move the idea's last_activity_at forward to time (never backward).
+        """
+        self.filter(pk=idea_id).filter(
+            Q(last_activity_at__isnull=True) | Q(last_activity_at__lt=time)
+        ).update(last_activity_at=time)
+
+    def trending_reference(self):
+        """
+        When refresh_trending_scores last ran, or None if it hasn't within
+        the trending horizon, in which case the scores mean nothing.
+        """
+        cutoff = timezone.now() - _trending_horizon()
+        times = [ran_at for ran_at in TrendingRun.objects.filter(
+            ran_at__gte=cutoff).values_list('ran_at', flat=True)]
+        return times[0] if times else None
+
+    def trending_weight(self, weight, time):
+        """
+        The amount an event of the given weight at time adds to an idea's
+        trending_score.  The scores are decayed to the time they were last
+        computed, so later events count for more rather than earlier ones
+        for less; the order comes out the same and nothing has to be
+        rewritten as time passes.  Zero when there are no current scores.
+        """
+        return _trending_weight(weight, time, self.trending_reference())
+
+    def record_trending(self, events):
+        """
+        Add events, (idea_id, weight, time) tuples, to the trending scores,
+        with one update per idea.  A negative weight takes an event back
+        out.  For events applied in bulk, such as buffered votes.
+        """
+        reference = self.trending_reference()
+        if reference is None:
+            return
+        deltas = {}
+        for idea_id, weight, time in events:
+            deltas[idea_id] = deltas.get(idea_id, 0.0) + \
+                _trending_weight(weight, time, reference)
+        for idea_id, delta in deltas.items():
+            self.filter(pk=idea_id).update(
+                trending_score=F('trending_score') + delta)
+
+    def record_vote(self, idea_id, time):
+        self.filter(pk=idea_id).update(
+            vote_count=F('vote_count') + 1,
+            trending_score=F('trending_score') +
+            self.trending_weight(1.0, time))
+        self.touch(idea_id, time)
+
+    def record_unvote(self, idea_id, time):
+        self.filter(pk=idea_id).update(
+            vote_count=F('vote_count') - 1,
+            trending_score=F('trending_score') -
+            self.trending_weight(1.0, time))
+
+    def record_comment(self, idea_id, time):
+        comment_weight = getattr(settings, 'IDEA_TRENDING_COMMENT_WEIGHT', 2.0)
+        self.filter(pk=idea_id).update(
+            comment_count=F('comment_count') + 1,
+            trending_score=F('trending_score') +
+            self.trending_weight(comment_weight, time))
+        self.touch(idea_id, time)
+
+    def refresh_comment_count(self, idea_id):
+        count = MPTTComment.objects.for_model(Idea).filter(
+            is_public=True, is_removed=False, object_pk=idea_id).count()
+        self.filter(pk=idea_id).update(comment_count=count)
+
+    def refresh_counters(self, idea_ids=None):
+        """
+        Recompute vote_count, comment_count and last_activity_at from the
+        Vote and comment tables.  Pass idea_ids to limit the rebuild to a
+        subset of ideas.  Returns the number of ideas updated.
+        """
+        with transaction.commit_on_success():
+            updated, scopes = self.update_counters(idea_ids)
+        versions.bump(*scopes)
+        return updated
+
+    def update_counters(self, idea_ids=None):
+        """
+        As refresh_counters, but within the caller's transaction and without
+        moving any versions.  Returns the number of ideas updated and the
+        version scopes to bump once the transaction has committed.
+        """
+        ideas = self.all()
+        votes = Vote.objects.all()
+        comments = MPTTComment.objects.for_model(Idea).filter(
+            is_public=True, is_removed=False)
+        if idea_ids is not None:
+            ideas = ideas.filter(pk__in=idea_ids)
+            votes = votes.filter(idea__in=idea_ids)
+            comments = comments.filter(
+                object_pk__in=[str(idea_id) for idea_id in idea_ids])
+
+        vote_stats = {}
+        for row in votes.order_by().values('idea').annotate(
+                count=Count('id'), latest=Max('time')):
+            vote_stats[row['idea']] = (row['count'], row['latest'])
+
+        comment_stats = {}
+        for row in comments.order_by().values('object_pk').annotate(
+                count=Count('id'), latest=Max('submit_date')):
+            comment_stats[int(row['object_pk'])] = (row['count'],
+                                                    row['latest'])
+
+        updated = 0
+        scopes = set([versions.IDEAS])
+        for idea_id, time, banner_id in ideas.values_list(
+                'id', 'time', 'banner'):
+            vote_count, vote_time = vote_stats.get(idea_id, (0, None))
+            comment_count, comment_time = comment_stats.get(idea_id,
+                                                            (0, None))
+            last_activity_at = max([t for t in (time, vote_time,
+                                                comment_time) if t])
+            self.filter(pk=idea_id).update(
+                vote_count=vote_count, comment_count=comment_count,
+                last_activity_at=last_activity_at)
+            updated += 1
+            scopes.add(versions.idea_scope(idea_id))
+            if banner_id is not None:
+                scopes.add(versions.banner_scope(banner_id))
+        return updated, scopes
+
+    def refresh_trending_scores(self, now=None):
+        """
+        Recompute trending_score for every active idea.
+
+        The idea's submission, each vote and each comment add a weight that
+        halves every IDEA_TRENDING_HALF_LIFE hours, so a burst of recent
+        activity outranks a single comment on an old idea.  Activity older
+        than IDEA_TRENDING_HORIZON half-lives is ignored.  Until the next
+        run, new ideas, votes and comments add to the scores as they come
+        in (see trending_weight).  Returns the number of ideas with a
+        non-zero score.
+        """
+        if now is None:
+            now = timezone.now()
+        comment_weight = getattr(settings, 'IDEA_TRENDING_COMMENT_WEIGHT', 2.0)
+        decay_rate = _trending_decay_rate()
+        cutoff = now - _trending_horizon()
+
+        def decayed(weight, time):
+            age = max(_seconds(now - time), 0)
+            return weight * math.exp(-decay_rate * age)
+
+        active = self.filter(state__name='Active')
+        scores = {}
+        for idea_id, time in active.filter(time__gte=cutoff).values_list(
+                'id', 'time').iterator():
+            scores[idea_id] = decayed(1.0, time)
+        for idea_id, time in Vote.objects.filter(
+                time__gte=cutoff, idea__state__name='Active').values_list(
+                'idea', 'time').iterator():
+            scores[idea_id] = scores.get(idea_id, 0) + decayed(1.0, time)
+        active_ids = set(active.filter(
+            last_activity_at__gte=cutoff).values_list('id', flat=True))
+        comments = MPTTComment.objects.for_model(Idea).filter(
+            is_public=True, is_removed=False, submit_date__gte=cutoff)
+        for object_pk, time in comments.values_list(
+                'object_pk', 'submit_date').iterator():
+            idea_id = int(object_pk)
+            if idea_id in active_ids:
+                scores[idea_id] = (scores.get(idea_id, 0) +
+                                   decayed(comment_weight, time))
+
+        with transaction.commit_on_success():
+            active.exclude(trending_score=0).update(trending_score=0)
+            if scores:
+                cursor = connection.cursor()
+                cursor.executemany(
+                    'UPDATE %s SET %s = %%s WHERE %s = %%s' % (
+                        connection.ops.quote_name(self.model._meta.db_table),
+                        connection.ops.quote_name('trending_score'),
+                        connection.ops.quote_name('id')),
+                    [(score, idea_id) for idea_id, score in scores.items()])
+                transaction.set_dirty()
+            if not TrendingRun.objects.update(ran_at=now):
+                TrendingRun(ran_at=now).save()
+        versions.bump(versions.IDEAS)
+        return len(scores)
 
 
 class Idea(UserTrackable):
@@ -161,9 +442,46 @@ class Idea(UserTrackable):
     is_anonymous = models.BooleanField("anonymous Idea", default=False, help_text="""
         Only enable anonymous if the Idea's challenge is private""")
 
+    #   Denormalized counters, maintained by the Vote and comment signal
+    #   handlers below.  Rebuild with `manage.py rebuild_idea_counters`.
+    vote_count = models.IntegerField(default=0, editable=False, db_index=True)
+    comment_count = models.IntegerField(default=0, editable=False,
+                                        db_index=True)
+    last_activity_at = models.DateTimeField(null=True, blank=True,
+                                            editable=False, db_index=True)
+    #   Time-decayed activity score, recomputed in batch by
+    #   `manage.py refresh_trending_scores`.
+    trending_score = models.FloatField(default=0, editable=False,
+                                       db_index=True)
+
     def __unicode__(self):
         return u'%s' % self.title
 
+    class Meta:
+        #   Back the default 'trending' listing of active ideas
+        index_together = [('state', 'last_activity_at'),
+                          ('state', 'trending_score')]
+
+    #   Kept up to date by IdeaManager's queries as votes and comments come
+    #   and go; a save only writes them when inserting the idea.
+    COUNTER_FIELDS = ('vote_count', 'comment_count', 'last_activity_at',
+                      'trending_score')
+
+    def save(self, *args, **kwargs):
+        if self.last_activity_at is None:
+            self.last_activity_at = self.time
+        if self._state.adding and not self.trending_score:
+            self.trending_score = Idea.objects.trending_weight(1.0, self.time)
+        if not self._state.adding and not kwargs.get('force_insert') and \
+                kwargs.get('update_fields') is None:
+            #   Writing back the counters loaded with the instance would
+            #   lose any vote or comment made since.
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.fields
+                if not field.primary_key and
+                field.name not in self.COUNTER_FIELDS]
+        super(Idea, self).save(*args, **kwargs)
+
     def url(self):
         """
         Lookup the view url for this idea.
@@ -178,15 +496,26 @@ class Idea(UserTrackable):
     @property
     def members(self):
         """
-        Return all users participating in an idea
+        Return all users participating in an idea: the creator, then
+        everyone who has commented under their own name.  Their ids are
+        cached until the idea next changes.
         """
-        members = []
-        members.append(self.creator)
-
-        for c in self.comments:
-            if c.user not in members and not c.is_anonymous:
-                members.append(c.user)
-
+        User = self._meta.get_field('creator').rel.to
+        key = member_ids = None
+        if versions.shared():
+            key = versions.key('idea:members:%s' % self.pk,
+                               versions.idea_scope(self.pk))
+            member_ids = cache.get(key)
+        if member_ids is None:
+            commenters = self.comments.filter(
+                is_anonymous=False).order_by().values('user')
+            members = [user for user in User.objects.filter(
+                Q(pk=self.creator_id) | Q(pk__in=commenters))]
+            if key is not None:
+                cache.set(key, [user.id for user in members], 60 * 60 * 24)
+        else:
+            members = [user for user in User.objects.filter(pk__in=member_ids)]
+        members.sort(key=lambda user: user.id != self.creator_id)
         return members
 
     def get_creator_profile(self):
@@ -209,7 +538,131 @@ class Vote(UserTrackable):
     vote = models.SmallIntegerField(choices=VOTE_CHOICES, default=1)
     idea = models.ForeignKey(Idea)
 
+    class Meta:
+        # One like per user; see views.toggle_vote
+        unique_together = (('idea', 'creator'),)
+
+
+class PendingVote(models.Model):
+
+    """ A like or unlike waiting to be applied to the Vote table, when votes
+    are buffered (see idea.vote_buffer). """
+    idea = models.ForeignKey(Idea)
+    creator = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+')
+    liked = models.BooleanField(default=True)
+    time = models.DateTimeField(default=timezone.now)
+
+
+class TrendingRun(models.Model):
+
+    """ When the trending scores were last computed, as a single row; see
+    IdeaManager.refresh_trending_scores. """
+    ran_at = models.DateTimeField()
+
 
 class Config(models.Model):
     key = models.CharField(max_length=50, unique=True)
     value = models.TextField(max_length=2000)
+
+
+class PendingNotification(models.Model):
+
+    """ A comment notification waiting for the send_idea_notifications
+    command to deliver it (see idea.notifications). """
+    idea = models.ForeignKey(Idea)
+    actor = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+')
+    recipient = models.ForeignKey(settings.AUTH_USER_MODEL, related_name='+')
+    is_anonymous = models.BooleanField(default=False)
+    created = models.DateTimeField(default=timezone.now)
+
+
+def _bump_idea(idea_id, banner_id):
+    """ Move the versions of everything showing the idea. """
+    scopes = [versions.IDEAS, versions.idea_scope(idea_id)]
+    if banner_id is not None:
+        scopes.append(versions.banner_scope(banner_id))
+    versions.bump(*scopes)
+
+
+def _idea_activity(idea_id):
+    """ As _bump_idea, for a vote or comment on the idea. """
+    banner_ids = [banner_id for banner_id in Idea.objects.filter(
+        pk=idea_id).values_list('banner', flat=True)]
+    _bump_idea(idea_id, banner_ids[0] if banner_ids else None)
+
+
+@receiver(post_save, sender=Vote)
+def vote_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Idea.objects.record_vote(instance.idea_id, instance.time)
+    _idea_activity(instance.idea_id)
+
+
+@receiver(post_delete, sender=Vote)
+def vote_deleted(sender, instance, **kwargs):
+    Idea.objects.record_unvote(instance.idea_id, instance.time)
+    _idea_activity(instance.idea_id)
+
+
+def _comment_idea_id(comment):
+    """
+    Return the id of the idea a comment was posted on, or None if the
+    comment belongs to some other model.
+    """
+    idea_type = ContentType.objects.get_for_model(Idea)
+    if comment.content_type_id != idea_type.id:
+        return None
+    return int(comment.object_pk)
+
+
+@receiver(post_save, sender=MPTTComment)
+def comment_saved(sender, instance, created, raw=False, **kwargs):
+    idea_id = _comment_idea_id(instance)
+    if idea_id is None or raw:
+        return
+    if created:
+        if instance.is_public and not instance.is_removed:
+            Idea.objects.record_comment(idea_id, instance.submit_date)
+    else:
+        #   Moderation flips is_public/is_removed on existing comments
+        Idea.objects.refresh_comment_count(idea_id)
+    _idea_activity(idea_id)
+
+
+@receiver(post_delete, sender=MPTTComment)
+def comment_deleted(sender, instance, **kwargs):
+    idea_id = _comment_idea_id(instance)
+    if idea_id is not None:
+        Idea.objects.refresh_comment_count(idea_id)
+        _idea_activity(idea_id)
+
+
+@receiver(post_save, sender=TaggedItem)
+@receiver(post_delete, sender=TaggedItem)
+def tagged_item_changed(sender, instance, **kwargs):
+    scopes = [versions.TAGS]
+    idea_type = ContentType.objects.get_for_model(Idea)
+    if instance.content_type_id == idea_type.id:
+        scopes.append(versions.idea_scope(instance.object_id))
+    versions.bump(*scopes)
+
+
+@receiver(post_save, sender=Idea)
+@receiver(post_delete, sender=Idea)
+def idea_changed(sender, instance, **kwargs):
+    #   Tag clouds depend on each idea's state and banner
+    versions.bump(versions.TAGS)
+    _bump_idea(instance.id, instance.banner_id)
+
+
+@receiver(post_save, sender=Banner)
+@receiver(post_delete, sender=Banner)
+def banner_changed(sender, instance, **kwargs):
+    versions.bump(versions.BANNERS, versions.TAGS,
+                  versions.banner_scope(instance.id))
+
+
+@receiver(post_save, sender=Config)
+@receiver(post_delete, sender=Config)
+def config_changed(sender, **kwargs):
+    config_helper.invalidate_config()
@@ -0,0 +1,182 @@
+"""
+Comment notifications for idea members.
+
+Notifications go out through collab's notification app, so nothing is sent
+when IdeaBox runs outside of collab.  By default they are sent while the
+comment is being posted; with the IDEA_QUEUE_NOTIFICATIONS setting on they
+are queued as PendingNotification rows instead, and delivered by the
+send_idea_notifications management command.
+
+Setting IDEA_NOTIFICATION_DIGEST_INTERVAL (minutes) also queues them, but
+holds each recipient's notifications for an idea until the oldest has waited
+that long, then sends a single one summarizing all of those comments.
+
+Queued notifications are claimed before they are sent: a batch is locked and
+deleted in one transaction, and only sent once that has committed.  Runs of
+the command that overlap never send the same notification twice, and one
+that dies part way through drops the rest of its batch rather than sending
+it again next time.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from idea.models import Idea, PendingNotification
+
+
+def notifications_available():
+    try:
+        import core.notifications.models
+    except ImportError:
+        return False
+    return True
+
+
+def notify(idea, actor, recipient, is_anonymous, count=1):
+    """
+    Tell recipient that actor commented on idea, or, given a count above
+    one, that there are count new comments on it.
+    """
+    from core.notifications.models import Notification
+    from core.notifications.email import EmailInfo
+    from core.helpers import normalize
+
+    if count > 1:
+        title = u'%d new comments on "%s"' % (count, idea.title)
+        text_template = 'new_comments_digest.txt'
+        html_template = 'new_comments_digest.html'
+    elif is_anonymous:
+        title = u'Someone commented on "%s"' % idea.title
+        text_template = 'new_comment_anonymous.txt'
+        html_template = 'new_comment_anonymous.html'
+    else:
+        title = u'%s %s comented on "%s"' % (normalize(actor.first_name),
+                                             normalize(actor.last_name),
+                                             idea.title)
+        text_template = 'new_comment.txt'
+        html_template = 'new_comment.html'
+
+    email_info = EmailInfo(
+                    subject = title,
+                    text_template = 'idea/email/%s' % text_template,
+                    html_template = 'idea/email/%s' % html_template,
+                    to_address = recipient.email,
+                )
+    Notification.set_notification(actor, actor, "commented", idea,
+                                  recipient, title, idea.url(), email_info)
+
+
+def comment_posted(comment):
+    """
+    Notify every member of the commented idea except the commenter, either
+    right away or through the queue.
+    """
+    if not notifications_available():
+        return
+    idea = comment.content_object
+    if not isinstance(idea, Idea):
+        return
+    recipients = [user for user in idea.members if user != comment.user]
+    if getattr(settings, 'IDEA_QUEUE_NOTIFICATIONS', False) or \
+            getattr(settings, 'IDEA_NOTIFICATION_DIGEST_INTERVAL', None):
+        PendingNotification.objects.bulk_create([
+            PendingNotification(idea=idea, actor=comment.user,
+                                recipient=recipient,
+                                is_anonymous=comment.is_anonymous)
+            for recipient in recipients])
+    else:
+        for recipient in recipients:
+            notify(idea, comment.user, recipient, comment.is_anonymous)
+
+
+def _load_related(pendings):
+    """
+    Fetch the ideas and users of the claimed notifications in two queries;
+    the rows are locked without them, so as not to lock those too.
+    """
+    ideas = Idea.objects.in_bulk(
+        set([pending.idea_id for pending in pendings]))
+    users = get_user_model().objects.in_bulk(
+        set([pending.actor_id for pending in pendings] +
+            [pending.recipient_id for pending in pendings]))
+    for pending in pendings:
+        pending.idea = ideas[pending.idea_id]
+        pending.actor = users[pending.actor_id]
+        pending.recipient = users[pending.recipient_id]
+
+
+def send_pending(batch_size=200, now=None):
+    """
+    Deliver the queued notifications, oldest first, batch_size at a time.
+    Within a batch a recipient gets at most one notification per idea, for
+    the latest comment.  In digest mode, see send_digests.  Returns the
+    number of notifications sent.
+    """
+    if not notifications_available():
+        return 0
+    interval = getattr(settings, 'IDEA_NOTIFICATION_DIGEST_INTERVAL', None)
+    if interval:
+        if now is None:
+            now = timezone.now()
+        return send_digests(now - timedelta(minutes=interval), batch_size)
+
+    sent = 0
+    while True:
+        with transaction.commit_on_success():
+            batch = [pending for pending in PendingNotification.objects.
+                     select_for_update().order_by('id')[:batch_size]]
+            if not batch:
+                return sent
+            PendingNotification.objects.filter(
+                id__in=[pending.id for pending in batch]).delete()
+
+        latest = {}
+        for pending in batch:
+            latest[(pending.recipient_id, pending.idea_id)] = pending
+        to_send = sorted(latest.values(), key=lambda p: p.id)
+        _load_related(to_send)
+        for pending in to_send:
+            notify(pending.idea, pending.actor, pending.recipient,
+                   pending.is_anonymous)
+            sent += 1
+
+
+def send_digests(cutoff, batch_size=200):
+    """
+    Send one notification per recipient and idea whose oldest queued
+    notification was created before cutoff, covering everything queued
+    for that pair.  A pair is claimed by locking its latest notification;
+    pairs another run has claimed in the meantime are skipped.  Returns the
+    number of notifications sent.
+    """
+    groups = [group for group in PendingNotification.objects.values(
+        'recipient', 'idea'
+    ).annotate(
+        first=Min('created'), count=Count('id'), latest=Max('id')
+    ).filter(first__lte=cutoff).order_by('first')]
+
+    sent = 0
+    for start in range(0, len(groups), batch_size):
+        chunk = groups[start:start + batch_size]
+        with transaction.commit_on_success():
+            latest = PendingNotification.objects.select_for_update(
+            ).in_bulk([group['latest'] for group in chunk])
+            chunk = [group for group in chunk if group['latest'] in latest]
+            #   One small delete per pair rather than a single statement
+            #   with a condition (and parameters) for every pair in the chunk
+            for group in chunk:
+                PendingNotification.objects.filter(
+                    recipient=group['recipient'], idea=group['idea'],
+                    id__lte=group['latest']).delete()
+
+        _load_related(latest.values())
+        for group in chunk:
+            pending = latest[group['latest']]
+            notify(pending.idea, pending.actor, pending.recipient,
+                   pending.is_anonymous, count=group['count'])
+            sent += 1
+    return sent
@@ -1,7 +1,7 @@
 from haystack import indexes
 from models import Idea, Banner
 from django.core.urlresolvers import reverse
-from time import mktime, strptime
+from time import mktime
 
 class IdeaIndex(indexes.SearchIndex, indexes.Indexable):
     text = indexes.EdgeNgramField(document=True, use_template=True)
@@ -24,7 +24,7 @@ class IdeaIndex(indexes.SearchIndex, indexes.Indexable):
     def prepare_index_sort(self, obj):
         # want a positive number so banner results appear above/before ideas
         #9999999999 =~ year 2286
-        return 9999999999 - int(mktime(strptime(obj.recent_activity, "%Y-%m-%d %H:%M:%S")))
+        return 9999999999 - int(mktime(obj.last_activity_at.timetuple()))
 
     def prepare_url(self, obj):
         return reverse('idea:idea_detail', args=(obj.id,))
@@ -2,3 +2,15 @@ from .base import *
 
 INSTALLED_APPS += ('django_nose',)
 TEST_RUNNER = 'django_nose.runner.NoseTestSuiteRunner'
+
+# A real cache, so the cached paths are tested too; test cases that go
+# through them clear it in setUp, as cached values outlive each test's
+# transaction
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# The tests run in a single process, so any cache is as good as shared
+IDEA_SHARED_CACHE = True
@@ -14,13 +14,39 @@ $(document).ready(function() {
     });
 
     //Change the button voted text to "unlike" on hover
-    $(".btn-voted").hover(
-        function(){
+    $(document).on({
+        mouseenter: function(){
             $(this).val('Unlike');
         },
-        function(){
+        mouseleave: function(){
             $(this).val('Liked');
+        }
+    }, ".btn-voted");
+
+    //Like and unlike without reloading the page
+    $(document).on("submit", ".idea-votes form", function(event) {
+        var $form = $(this);
+        event.preventDefault();
+        $.ajax({
+            type: "POST",
+            url: $form.attr("action"),
+            data: $form.serialize(),
+            dataType: "json",
+            success: function(data) {
+                var $votes = $form.closest(".idea-votes");
+                $votes.find(".count").text(data.vote_count);
+                $votes.find(".phrase").text(data.vote_count == 1 ? "Like" : "Likes");
+                $form.find(":submit")
+                    .toggleClass("btn-voted", data.liked)
+                    .toggleClass("btn-vote", !data.liked)
+                    .val(data.liked ? "Liked" : "Like");
+            },
+            error: function() {
+                // fall back to a normal post (this skips the handler)
+                $form.get(0).submit();
+            }
         });
+    });
 
     function show_reply_form(event) {
         var $this = $(this);
@@ -2,6 +2,7 @@ from django.contrib.auth import get_user_model
 from django.core.urlresolvers import reverse
 from django.conf import settings
 from django.test import TestCase
+from django.core.cache import cache
 from django.utils import unittest
 from idea import models, views
 from idea.tests.utils import mock_req, random_user, login, create_superuser
@@ -20,6 +21,7 @@ class AddIdeaTest(TestCase):
     fixtures = ['state']
 
     def setUp(self):
+        cache.clear()
         create_superuser()
 
     def test_good_idea(self):
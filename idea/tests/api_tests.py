@@ -0,0 +1,119 @@
+import datetime
+import json
+from django.http import Http404
+from django.test import TestCase
+from django.core.cache import cache
+from idea import api, models
+from idea.tests.utils import mock_req, random_user
+
+
+class ApiTest(TestCase):
+    """
+    Tests for idea.api
+    """
+    fixtures = ['state']
+
+    def setUp(self):
+        cache.clear()
+        self.active = models.State.objects.get(name='Active')
+        self.room = models.Banner(title='Room', text='Room Text',
+                                  is_private=True,
+                                  start_date=datetime.date.today())
+        self.room.save()
+
+    def _idea(self, title, **kwargs):
+        kwargs.setdefault('state', self.active)
+        idea = models.Idea(creator=random_user(), title=title,
+                           text=title + ' Text', **kwargs)
+        idea.save()
+        return idea
+
+    def _get(self, view, path='/', *args):
+        resp = view(mock_req(path), *args)
+        return resp.status_code, json.loads(resp.content)
+
+    def test_ideas_visible(self):
+        """
+        Ideas in private banners and ideas in other states are left out.
+        """
+        idea = self._idea('AAAA')
+        self._idea('BBBB', banner=self.room)
+        archived = self._idea('CCCC',
+                              state=models.State.objects.get(name='Archive'))
+
+        status, data = self._get(api.ideas)
+        self.assertEqual(200, status)
+        self.assertEqual([idea.id], [row['id'] for row in data['results']])
+        self.assertEqual(None, data['next_cursor'])
+
+        status, data = self._get(api.ideas, '/?state=archived')
+        self.assertEqual([archived.id],
+                         [row['id'] for row in data['results']])
+
+        self.assertRaises(Http404, api.idea, mock_req(), str(idea.id + 1))
+
+    def test_fields(self):
+        """
+        Only the requested fields are returned; anonymous ideas have no
+        creator.
+        """
+        idea = self._idea('AAAA', is_anonymous=True)
+        idea.tags.add('bbb', 'aaa')
+
+        status, data = self._get(api.idea, '/?fields=title,creator,tags',
+                                 str(idea.id))
+        self.assertEqual({'title': 'AAAA', 'creator': None,
+                          'tags': ['aaa', 'bbb']}, data)
+
+        status, data = self._get(api.ideas, '/?fields=title,nope')
+        self.assertEqual(400, status)
+        self.assertTrue('nope' in data['error'])
+
+    def test_cursor(self):
+        """
+        Pages follow each other through next_cursor.
+        """
+        ideas = [self._idea(title) for title in ('AAAA', 'BBBB', 'CCCC')]
+
+        status, data = self._get(api.ideas, '/?fields=id&per_page=2')
+        self.assertEqual([ideas[2].id, ideas[1].id],
+                         [row['id'] for row in data['results']])
+        status, data = self._get(
+            api.ideas, '/?fields=id&per_page=2&cursor=%s' %
+            data['next_cursor'])
+        self.assertEqual([{'id': ideas[0].id}], data['results'])
+        self.assertEqual(None, data['next_cursor'])
+
+        status, data = self._get(api.ideas, '/?cursor=bogus')
+        self.assertEqual(400, status)
+
+    def test_votes(self):
+        """
+        An idea's likes are listed most recent first; a private idea's are
+        not listed at all.
+        """
+        idea = self._idea('AAAA')
+        voters = [random_user(), random_user()]
+        for voter in voters:
+            models.Vote(creator=voter, idea=idea).save()
+
+        status, data = self._get(api.idea_votes, '/?fields=creator',
+                                 str(idea.id))
+        self.assertEqual([voters[1].username, voters[0].username],
+                         [row['creator'] for row in data['results']])
+
+        private = self._idea('BBBB', banner=self.room)
+        self.assertRaises(Http404, api.idea_votes, mock_req(),
+                          str(private.id))
+
+    def test_banners(self):
+        """
+        Private banners are left out.
+        """
+        banner = models.Banner(title='Challenge', text='Challenge Text',
+                               start_date=datetime.date.today())
+        banner.save()
+
+        status, data = self._get(api.banners, '/?fields=id,title')
+        self.assertEqual([{'id': banner.id, 'title': 'Challenge'}],
+                         data['results'])
@@ -1,11 +1,19 @@
 import datetime
-from django.test import TestCase
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import IntegrityError
+from django.test import TestCase, TransactionTestCase
+from mock import patch
 from idea import models, views
 
 def get_relative_date(delta_days=0):
     return datetime.date.today() + datetime.timedelta(days=delta_days)
 
 class BannerTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
     def test_timebound_banner(self):
         yesterday = get_relative_date(-1)
         tomorrow = get_relative_date(+1)
@@ -93,3 +101,80 @@ class BannerTest(TestCase):
                 start_date=today, end_date=tomorrow)
         banner5.save()
         self.assertEqual(list(views.get_current_banners()), [banner1,banner5,banner2])
+
+    @patch('idea.utility.versions.cache', LocMemCache('versions', {}))
+    @patch('idea.models.cache', LocMemCache('banner_tests', {}))
+    def test_current_banners_cached(self):
+        yesterday = get_relative_date(-1)
+        banner1 = models.Banner(title="Banner 1", text="Banner 1",
+                start_date=yesterday)
+        banner1.save()
+        self.assertEqual(models.Banner.objects.current_list(), [banner1])
+        with self.assertNumQueries(0):
+            self.assertEqual(views.get_banner(), banner1)
+
+        # saving a banner discards the snapshot
+        banner1.end_date = yesterday
+        banner1.save()
+        self.assertIsNone(views.get_banner())
+
+    def test_unique_slug(self):
+        def room(title):
+            banner = models.Banner(title=title, text=title, is_private=True,
+                    start_date=get_relative_date(-1))
+            banner.save()
+            return banner.slug
+
+        self.assertEqual(room("Daily Roundup"), "daily-roundup")
+        self.assertEqual(room("Daily Roundup"), "daily-roundup-2")
+        self.assertEqual(room("Daily Roundups"), "daily-roundups")
+        self.assertEqual(room("Daily Roundup"), "daily-roundup-3")
+        # nothing to slugify
+        self.assertEqual(room("???"), "banner")
+        self.assertEqual(room("!!!"), "banner-2")
+
+    def test_unique_slug_retry(self):
+        banner = models.Banner(title="Roundup", text="Roundup",
+                start_date=get_relative_date(-1))
+        calls = []
+        def save():
+            calls.append(banner.slug)
+            if len(calls) == 1:
+                # another process took the slug first
+                raise IntegrityError('column slug is not unique')
+            super(models.Banner, banner).save()
+        # the test's own transaction is managed, and must not be committed
+        with patch('idea.models.transaction.commit') as commit:
+            models.save_with_unique_slug(banner, 'title', 'slug', save)
+        self.assertFalse(commit.called)
+        self.assertEqual(calls, ['roundup', 'roundup'])
+        self.assertIsNotNone(banner.pk)
+
+
+class UniqueSlugTransactionTest(TransactionTestCase):
+    """
+    Slug collisions in plain (autocommitted) saves, outside of the
+    transaction TestCase wraps around each test.
+    """
+    def test_unique_slug_retry(self):
+        models.Banner(title="Roundup", text="Roundup", is_private=True,
+                start_date=get_relative_date(-1)).save()
+
+        unique_slug = models.unique_slug
+        def stale_slug(item, slug_source, slug_field):
+            # the first attempt picks the slug as if the other banner
+            # had not been saved yet
+            if not stale_slug.called:
+                stale_slug.called = True
+                setattr(item, slug_field, 'roundup')
+            else:
+                unique_slug(item, slug_source, slug_field)
+        stale_slug.called = False
+
+        banner = models.Banner(title="Roundup", text="Roundup",
+                is_private=True, start_date=get_relative_date(-1))
+        with patch('idea.models.unique_slug', stale_slug):
+            banner.save()
+        self.assertEqual('roundup-2', banner.slug)
+        self.assertEqual(['roundup', 'roundup-2'], sorted(
+            models.Banner.objects.values_list('slug', flat=True)))
@@ -1,4 +1,5 @@
 from django.test import TestCase
+from django.core.cache import cache
 from idea import models, views
 from idea.tests.utils import mock_req
 from mock import patch
@@ -12,6 +13,10 @@ class ListViewTest(TestCase):
     Tests for idea.views.list
     """
     fixtures = ['state']
+
+    def setUp(self):
+        cache.clear()
+
     def _generate_data(self, paramfn=lambda x,y:None, postfn=lambda x,y:None,
             entry_data=[(5, 'AAAA'), (9, 'BBBB'), (3, 'CCCC'), (7, 'DDDD'),
                         (1, 'EEEE'), (11, 'FFFF')]):
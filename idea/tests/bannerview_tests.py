@@ -2,6 +2,7 @@ import datetime
 from django.contrib.auth import get_user_model
 from django.utils.timezone import get_default_timezone
 from django.test import TestCase
+from django.core.cache import cache
 from idea import models, views
 from idea.tests.utils import mock_req, random_user
 from mock import patch
@@ -15,6 +16,10 @@ class BannerViewTest(TestCase):
     Tests for idea.views.challenge_detail
     """
     fixtures = ['state']
+
+    def setUp(self):
+        cache.clear()
+
     def _generate_data(self, paramfn=lambda x,y:None, postfn=lambda x,y:None,
             entry_data=[(5, 'AAAA'), (9, 'BBBB'), (3, 'CCCC'), (7, 'DDDD'),
                         (1, 'EEEE'), (11, 'FFFF')]):
@@ -2,6 +2,7 @@ import datetime
 from core.custom_comments.forms import MPTTCommentForm
 from core.custom_comments.models import MPTTComment
 from django.test import TestCase
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
 from idea import models
 from idea.tests.utils import random_user, create_superuser, login
@@ -38,6 +39,9 @@ class CommentTest(TestCase):
     """
     fixtures = ['state']
 
+    def setUp(self):
+        cache.clear()
+
     def test_not_anonymous_form(self):
         idea = create_idea()
         data = get_valid_form_data(idea)
@@ -1,5 +1,7 @@
 from django.contrib.auth import get_user_model
-from django.http import Http404
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import Http404, HttpResponse
 from django.test import TestCase
 from django.test.client import RequestFactory
 from idea import models, views
@@ -7,6 +9,7 @@ from idea.forms import IdeaTagForm
 from django.core.urlresolvers import reverse
 from idea.tests.utils import mock_req, random_user, create_superuser, login
 from mock import patch
+import json
 import random
 
 class DetailViewTest(TestCase):
@@ -14,6 +17,10 @@ class DetailViewTest(TestCase):
     Tests for idea.views.detail.
     """
     fixtures = ['state']
+
+    def setUp(self):
+        cache.clear()
+
     def test_404s(self):
         """
         Should get a 404 when using a bad idea_id.
@@ -67,6 +74,18 @@ class DetailViewTest(TestCase):
         self.assertEqual(5, len(context['voters']))
         self.assertEqual(set([u.id for u in users]),
                 set([v.id for v in context['voters']]))
+        # no profile module is configured in the tests
+        self.assertEqual([None] * 5, [v.profile for v in context['voters']])
+        self.assertEqual(5, context['vote_count'])
+
+        # only the ten voters shown are loaded
+        for i in range(5, 12):
+            users.append(get_user_model().objects.create_user('example' + str(i)))
+            models.Vote(creator=users[i], idea=idea).save()
+        views.detail(mock_req(), str(idea.id))
+        context = render.call_args[0][2]
+        self.assertEqual(10, len(context['voters']))
+        self.assertEqual(12, context['vote_count'])
 
     @patch('idea.views.render')
     def test_idea_support(self, render):
@@ -128,6 +147,30 @@ class DetailViewTest(TestCase):
         tags.sort()
         self.assertEqual(tags, [tag.name for tag in context['tags']])
 
+    @patch('idea.views.render')
+    def test_tag_counts(self, render):
+        """
+        Each tag carries the number of ideas using it.
+        """
+        state = models.State.objects.get(name='Active')
+        idea = models.Idea(creator=random_user(), title='title', text='text',
+                state=state)
+        idea.save()
+        idea.tags.add('aaa', 'bbb')
+        other = models.Idea(creator=random_user(), title='other',
+                text='text', state=state)
+        other.save()
+        other.tags.add('aaa')
+
+        with patch('idea.utility.tag_helper.get_postings') as get_postings:
+            views.detail(mock_req(), str(idea.id))
+        # counted without loading every idea carrying the tags
+        self.assertFalse(get_postings.called)
+        context = render.call_args[0][2]
+        self.assertEqual([('aaa', 2), ('bbb', 1)],
+                [(tag.name, tag.tag_count) for tag in context['tags']])
+        self.assertEqual([], context['tags_created_by_user'])
+
     @patch('idea.views.render')
     def test_tag_form_exists(self, render):
         """
@@ -160,6 +203,44 @@ class DetailViewTest(TestCase):
         self.assertEqual(set(['aaa', 'bbb', 'ccc', 'ddd', 'eee', 'zzz']),
                 tags)
 
+    @patch('idea.utility.versions.cache', LocMemCache('versions', {}))
+    @patch('idea.views.render')
+    def test_conditional_get(self, render):
+        """
+        A repeated request for an unchanged idea is answered with a 304,
+        without rendering the page, until the idea or the user changes.
+        """
+        render.return_value = HttpResponse('detail')
+        idea = models.Idea(creator=random_user(), title='AAAA',
+                state = models.State.objects.get(name='Active'))
+        idea.save()
+        user = random_user()
+
+        resp = views.detail(mock_req(user=user), str(idea.id))
+        self.assertEqual(200, resp.status_code)
+        etag = resp['ETag']
+
+        req = mock_req(user=user)
+        req.META['HTTP_IF_NONE_MATCH'] = etag
+        self.assertEqual(304, views.detail(req, str(idea.id)).status_code)
+        self.assertEqual(1, render.call_count)
+
+        req = mock_req()
+        req.META['HTTP_IF_NONE_MATCH'] = etag
+        self.assertEqual(200, views.detail(req, str(idea.id)).status_code)
+
+        models.Vote(creator=user, idea=idea).save()
+        req = mock_req(user=user)
+        req.META['HTTP_IF_NONE_MATCH'] = etag
+        resp = views.detail(req, str(idea.id))
+        self.assertEqual(200, resp.status_code)
+
+        # the tag form is posted to the same view, whatever the validators
+        req = RequestFactory().post('/', {'tags': 'aaa'})
+        req.user = user
+        req.META['HTTP_IF_NONE_MATCH'] = resp['ETag']
+        self.assertEqual(302, views.detail(req, str(idea.id)).status_code)
+
     def test_anonymous_idea_hidden_name(self):
         user = random_user()
         state = models.State.objects.get(name='Active')
@@ -179,3 +260,54 @@ class DetailViewTest(TestCase):
 
         resp = self.client.get(reverse('idea:idea_detail', args=(idea2.id,)))
         self.assertFalse(user.first_name in resp.content)
+
+
+class ShowLikesTest(TestCase):
+    """
+    Tests for idea.views.show_likes.
+    """
+    fixtures = ['state']
+
+    def setUp(self):
+        cache.clear()
+        user = random_user()
+        state = models.State.objects.get(name='Active')
+        self.idea = models.Idea(creator=user, title='title', text='text',
+                state=state)
+        self.idea.save()
+        self.users = [random_user() for i in range(5)]
+        for user in self.users:
+            models.Vote(creator=user, idea=self.idea).save()
+
+    @patch('idea.views.render')
+    def test_voters_paged(self, render):
+        """
+        Voters come a page at a time, most recent first.
+        """
+        with self.settings(IDEA_VOTERS_PER_PAGE=3):
+            views.show_likes(mock_req(), str(self.idea.id))
+            context = render.call_args[0][2]
+            self.assertEqual([u.id for u in reversed(self.users)][:3],
+                    [v.id for v in context['voters']])
+            self.assertFalse(context['support'])
+
+            cursor = context['page'].next_cursor
+            views.show_likes(mock_req('/?cursor=%s' % cursor),
+                    str(self.idea.id))
+            context = render.call_args[0][2]
+            self.assertEqual([u.id for u in reversed(self.users)][3:],
+                    [v.id for v in context['voters']])
+            self.assertFalse(context['page'].has_next())
+
+    def test_voters_json(self):
+        """
+        The json format returns the page as a fragment and the next cursor.
+        """
+        with self.settings(IDEA_VOTERS_PER_PAGE=3):
+            response = views.show_likes(mock_req('/?format=json'),
+                    str(self.idea.id))
+        data = json.loads(response.content)
+        self.assertEqual('application/json', response['Content-Type'])
+        self.assertIn(self.users[-1].first_name, data['html'])
+        self.assertNotIn(self.users[0].first_name, data['html'])
+        self.assertIsNotNone(data['next_cursor'])
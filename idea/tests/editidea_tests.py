@@ -1,6 +1,7 @@
 from django.contrib.auth import get_user_model
 from django.core.urlresolvers import reverse
 from django.test import TestCase
+from django.core.cache import cache
 from idea import models, views
 from idea.forms import IdeaForm, PrivateIdeaForm
 from idea.tests.utils import mock_req, random_user, login, create_superuser
@@ -25,6 +26,7 @@ class EditIdeaTest(TestCase):
     fixtures = ['state']
 
     def setUp(self):
+        cache.clear()
         create_superuser()
 
     def test_edit_good_idea(self):
@@ -0,0 +1,60 @@
+import json
+from django.test import TestCase
+from idea import export, models
+from idea.tests.utils import random_user
+
+
+class ExportTest(TestCase):
+    """
+    Tests for idea.export
+    """
+    fixtures = ['state']
+
+    def setUp(self):
+        self.idea = models.Idea(creator=random_user(), title=u'AAAA \u2713',
+                                text='AAAA Text',
+                                state=models.State.objects.get(name='Active'))
+        self.idea.save()
+        self.voters = [random_user() for _ in range(3)]
+        for voter in self.voters:
+            models.Vote(creator=voter, idea=self.idea).save()
+
+    def test_csv(self):
+        """
+        A CSV export has a line of headings and then a line per row, across
+        chunks.
+        """
+        lines = [line for line in
+                 export.export_lines('votes', 'csv', chunk_size=2)]
+        self.assertEqual('id,idea,creator,time\r\n', lines[0])
+        self.assertEqual([voter.username for voter in self.voters],
+                         [line.split(',')[2] for line in lines[1:]])
+
+        lines = [line for line in export.export_lines('ideas', 'csv')]
+        self.assertEqual(2, len(lines))
+        self.assertTrue(u'AAAA \u2713'.encode('utf-8') in lines[1])
+
+    def test_jsonl(self):
+        """
+        A JSON Lines export has an object per row, and can be restricted to
+        some of the rows.
+        """
+        votes = models.Vote.objects.filter(creator=self.voters[1])
+        lines = [line for line in
+                 export.export_lines('votes', 'jsonl', votes)]
+        self.assertEqual(1, len(lines))
+        row = json.loads(lines[0])
+        self.assertEqual(self.voters[1].username, row['creator'])
+        self.assertEqual(self.idea.id, row['idea'])
+
+    def test_response(self):
+        """
+        The admin action streams the export as a download.
+        """
+        action = export.export_action('votes', 'csv')
+        response = action(None, None, models.Vote.objects.all())
+        self.assertTrue(response.streaming)
+        self.assertEqual('attachment; filename=votes.csv',
+                         response['Content-Disposition'])
+        self.assertEqual(4, len(''.join(response.streaming_content)
+                                .splitlines()))
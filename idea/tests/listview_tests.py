@@ -1,11 +1,18 @@
+import base64
 import datetime
+import json
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.utils.timezone import get_default_timezone
 from core.custom_comments.models import MPTTComment
 from django.contrib.contenttypes.models import ContentType
 from django.contrib.sites.models import Site
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse
 from django.test import TestCase
 from idea import models, views
+from idea.utility import config_helper, fragment_helper, tag_helper
 from idea.tests.utils import mock_req, random_user
 from mock import patch
 import string
@@ -25,6 +32,10 @@ class ListViewTest(TestCase):
     Tests for idea.views.list
     """
     fixtures = ['state']
+
+    def setUp(self):
+        cache.clear()
+
     def _generate_data(self, paramfn=lambda x,y:None, postfn=lambda x,y:None,
             entry_data=[(5, 'AAAA'), (9, 'BBBB'), (3, 'CCCC'), (7, 'DDDD'),
                         (1, 'EEEE'), (11, 'FFFF')]):
@@ -100,6 +111,64 @@ class ListViewTest(TestCase):
         views.list(mock_req(), sort_or_state='trending')
         self._verify_order(render)
 
+    @patch('idea.views.render')
+    def test_sort_trending_score(self, render):
+        """
+        Once trending scores are computed, a burst of recent likes outranks
+        a single recent comment on an old idea.  New ideas and likes count
+        right away, and withdrawn likes stop counting, without waiting for
+        the scores to be computed again.
+        """
+        idea_type = ContentType.objects.get(app_label="idea", model="idea")
+        site = Site.objects.get_current()
+        now = timezone.now()
+        def add_time(kwargs, nonce):
+            kwargs['time'] = now - datetime.timedelta(days=nonce)
+        def create_activity(idea, nonce):
+            if idea.title == 'AAAA':
+                MPTTComment(content_type=idea_type, site=site,
+                            object_pk=idea.pk, user=idea.creator,
+                            comment='Blah', submit_date=now).save()
+            elif idea.title == 'BBBB':
+                for _ in range(5):
+                    models.Vote(creator=random_user(), idea=idea,
+                                time=now - datetime.timedelta(hours=1)).save()
+        self._generate_data(paramfn=add_time, postfn=create_activity,
+                            entry_data=[(30, 'AAAA'), (1, 'BBBB'),
+                                        (60, 'CCCC')])
+
+        views.list(mock_req(), sort_or_state='trending')
+        context = render.call_args[0][2]
+        self.assertEqual(['AAAA', 'BBBB', 'CCCC'],
+                         [idea.title for idea in context['ideas']])
+
+        models.Idea.objects.refresh_trending_scores()
+        views.list(mock_req(), sort_or_state='trending')
+        context = render.call_args[0][2]
+        self.assertEqual(['BBBB', 'AAAA', 'CCCC'],
+                         [idea.title for idea in context['ideas']])
+
+        idea = models.Idea(creator=random_user(), title='DDDD',
+                text='DDDD Text', state=models.State.objects.get(name='Active'))
+        idea.save()
+        views.list(mock_req(), sort_or_state='trending')
+        context = render.call_args[0][2]
+        self.assertEqual(['BBBB', 'AAAA', 'DDDD', 'CCCC'],
+                         [idea.title for idea in context['ideas']])
+
+        for _ in range(2):
+            models.Vote(creator=random_user(), idea=idea).save()
+        views.list(mock_req(), sort_or_state='trending')
+        context = render.call_args[0][2]
+        self.assertEqual(['BBBB', 'DDDD', 'AAAA', 'CCCC'],
+                         [idea.title for idea in context['ideas']])
+
+        models.Vote.objects.filter(idea=idea).delete()
+        views.list(mock_req(), sort_or_state='trending')
+        context = render.call_args[0][2]
+        self.assertEqual(['BBBB', 'AAAA', 'DDDD', 'CCCC'],
+                         [idea.title for idea in context['ideas']])
+
     @patch('idea.views.render')
     def test_sort_vote(self, render):
         """
@@ -107,7 +176,7 @@ class ListViewTest(TestCase):
         """
         def create_votes(idea, nonce):
             for _ in range(nonce):
-                models.Vote(creator=idea.creator, idea=idea).save()
+                models.Vote(creator=random_user(), idea=idea).save()
         self._generate_data(postfn=create_votes)
         views.list(mock_req(), sort_or_state='vote')
         self._verify_order(render)
@@ -160,6 +229,54 @@ class ListViewTest(TestCase):
         self.assertEqual('KKKK', context['ideas'][0].title)
         self.assertEqual('MMMM', context['ideas'][2].title)
     
+    @patch('idea.views.render')
+    def test_cursor_paging(self, render):
+        """
+        Verify that cursor paging walks the same ordering as page numbers.
+        """
+        letters = string.uppercase
+        entry_data = []
+        for i in range(12, -1, -1):
+            entry_data.append((i+1, letters[i]*4))
+        self._generate_data(entry_data=entry_data)
+
+        views.list(mock_req('/?cursor='))
+        context = render.call_args[0][2]
+        page = context['ideas']
+        self.assertEqual(10, len(page))
+        self.assertEqual('AAAA', page[0].title)
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+
+        views.list(mock_req('/?cursor=%s' % page.next_cursor))
+        context = render.call_args[0][2]
+        page = context['ideas']
+        self.assertEqual(3, len(page))
+        self.assertEqual('KKKK', page[0].title)
+        self.assertEqual('MMMM', page[2].title)
+        self.assertFalse(page.has_next())
+
+        views.list(mock_req('/?cursor=%s' % page.previous_cursor))
+        context = render.call_args[0][2]
+        page = context['ideas']
+        self.assertEqual(10, len(page))
+        self.assertEqual('AAAA', page[0].title)
+        self.assertEqual('JJJJ', page[9].title)
+
+        views.list(mock_req('/?cursor=garbage'))
+        context = render.call_args[0][2]
+        self.assertEqual('AAAA', context['ideas'][0].title)
+
+        # well-formed, but with values no row can have
+        cursor = str(context['ideas'].next_cursor)
+        data = json.loads(base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)))
+        data['k'] = [None] * len(data['k'])
+        cursor = base64.urlsafe_b64encode(json.dumps(data)).rstrip('=')
+        views.list(mock_req('/?cursor=%s' % cursor))
+        context = render.call_args[0][2]
+        self.assertEqual('AAAA', context['ideas'][0].title)
+
     @patch('idea.views.render')
     def test_idea_fields(self, render):
         """
@@ -181,6 +298,22 @@ class ListViewTest(TestCase):
             self.assertTrue(hasattr(idea, 'vote_count'))
             self.assertTrue(hasattr(idea, 'time'))
 
+    @patch('idea.views.render')
+    def test_idea_liked(self, render):
+        """
+        Each idea should know whether the current user likes it.
+        """
+        self._generate_data()
+        voter = random_user()
+        liked = models.Idea.objects.get(title='BBBB')
+        models.Vote(creator=voter, idea=liked).save()
+        models.Vote(creator=random_user(), idea=models.Idea.objects.get(title='CCCC')).save()
+
+        views.list(mock_req(user=voter))
+        context = render.call_args[0][2]
+        for idea in context['ideas']:
+            self.assertEqual(idea.id == liked.id, idea.liked)
+
     @patch('idea.views.render')
     def test_idea_state_filter(self, render):
         """
@@ -363,6 +496,119 @@ class ListViewTest(TestCase):
             self.assertTrue(hasattr(tag, 'count'))
             self.assertEqual(i+1, tag.count)
 
+    @patch('idea.utility.versions.cache', LocMemCache('versions', {}))
+    @patch('idea.utility.tag_helper.cache', LocMemCache('tag_clouds', {}))
+    @patch('idea.views.render')
+    def test_tags_cached(self, render):
+        """
+        The unfiltered tag list is cached until tags change.
+        """
+        user = random_user()
+        state = models.State.objects.get(name='Active')
+        idea = models.Idea(creator=user, title='AAAA', text='AAAA Text',
+                state=state)
+        idea.save()
+        idea.tags.add('bbb', 'ccc')
+
+        views.list(mock_req())
+        context = render.call_args[0][2]
+        self.assertEqual(set(['bbb', 'ccc']),
+                set([t.name for t in context['tags']]))
+
+        with self.assertNumQueries(0):
+            tags = tag_helper.get_tag_cloud(models.Idea.objects.all(), 'active')
+        self.assertEqual(set(['bbb', 'ccc']), set([t.name for t in tags]))
+
+        idea.tags.add('ddd')
+        views.list(mock_req())
+        context = render.call_args[0][2]
+        self.assertEqual(set(['bbb', 'ccc', 'ddd']),
+                set([t.name for t in context['tags']]))
+        for tag in context['tags']:
+            self.assertEqual(1, tag.count)
+
+    @patch('idea.utility.fragment_helper.cache', LocMemCache('entries', {}))
+    @patch('idea.views.render')
+    def test_entries_cached(self, render):
+        """
+        Idea entries are shared between users, with each user's own Like
+        button, and rendered again when the idea changes.
+        """
+        idea = models.Idea(creator=random_user(), title='AAAA',
+                text='AAAA Text',
+                state=models.State.objects.get(name='Active'))
+        idea.save()
+        voter = random_user()
+        models.Vote(creator=voter, idea=idea).save()
+
+        views.list(mock_req(user=voter))
+        html = render.call_args[0][2]['ideas'][0].entry_html
+        self.assertIn('AAAA', html)
+        self.assertIn('value="Liked"', html)
+        self.assertIn('value="%s"' % idea.id, html)
+
+        with patch('idea.utility.fragment_helper.render_to_string',
+                   wraps=fragment_helper.render_to_string) as render_to_string:
+            views.list(mock_req())
+        # only the two Like buttons were rendered
+        self.assertEqual(2, render_to_string.call_count)
+        html = render.call_args[0][2]['ideas'][0].entry_html
+        self.assertIn('value="Like"', html)
+        self.assertIn('<div class="count">1</div>', html)
+
+        models.Vote(creator=random_user(), idea=idea).save()
+        views.list(mock_req())
+        html = render.call_args[0][2]['ideas'][0].entry_html
+        self.assertIn('<div class="count">2</div>', html)
+
+    @patch('idea.utility.versions.cache', LocMemCache('versions', {}))
+    @patch('idea.views.render')
+    def test_conditional_get(self, render):
+        """
+        A repeated request for an unchanged list is answered with a 304,
+        going by the ETag alone, and only when the cache is shared.
+        """
+        render.return_value = HttpResponse('list')
+        user = random_user()
+        resp = views.list(mock_req(user=user))
+        self.assertFalse(resp.has_header('Last-Modified'))
+        etag = resp['ETag']
+
+        req = mock_req(user=user)
+        req.META['HTTP_IF_NONE_MATCH'] = etag
+        self.assertEqual(304, views.list(req).status_code)
+        self.assertEqual(1, render.call_count)
+
+        with self.settings(IDEA_SHARED_CACHE=False):
+            req = mock_req(user=user)
+            req.META['HTTP_IF_NONE_MATCH'] = etag
+            self.assertEqual(200, views.list(req).status_code)
+
+    @patch('idea.utility.versions.cache', LocMemCache('versions', {}))
+    @patch('idea.utility.config_helper.cache', LocMemCache('config', {}))
+    @patch('idea.views.render')
+    def test_about_text(self, render):
+        """
+        The about text is stripped of script tags and cached until the
+        config changes.
+        """
+        views.list(mock_req())
+        self.assertEqual('', render.call_args[0][2]['about_text'])
+
+        config = models.Config(key='list_about',
+                               value='<script>alert(1)</script> About')
+        config.save()
+        views.list(mock_req())
+        self.assertEqual('alert(1) About', render.call_args[0][2]['about_text'])
+        with self.assertNumQueries(0):
+            self.assertEqual('alert(1) About',
+                             config_helper.get_value('list_about'))
+
+        config.value = 'Changed'
+        config.save()
+        views.list(mock_req())
+        self.assertEqual('Changed', render.call_args[0][2]['about_text'])
+
     @patch('idea.views.render')
     def test_tags_active(self, render):
         """
@@ -1,14 +1,19 @@
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
 from django.test import TestCase
 from idea import models
 from datetime import datetime
 from idea.tests.utils import random_user, create_superuser
+from idea.utility import state_helper, versions
 from core.custom_comments.models import MPTTComment
+from mock import patch
 
 
 class VotingTests(TestCase):
     fixtures = ['state']
 
     def setUp(self):
+        cache.clear()
         create_superuser()
         self.state = models.State.objects.get(name='Active')
 
@@ -80,3 +85,194 @@ class VotingTests(TestCase):
 
         self.assertEqual(len(idea.members), 1)
         self.assertIn(user, idea.members)
+
+
+    @patch('idea.utility.versions.cache', LocMemCache('versions', {}))
+    @patch('idea.models.cache', LocMemCache('members', {}))
+    def test_members_cached(self):
+        user = random_user()
+        idea = models.Idea(creator=user, title='Transit subsidy to Mars',
+                    text='Aliens need assistance.', state=self.state)
+        idea.save()
+
+        def add_comment(commenter, is_anonymous=False):
+            comment = MPTTComment()
+            comment.user = commenter
+            comment.content_object = idea
+            comment.comment = 'Test'
+            comment.is_public = True
+            comment.is_removed = False
+            comment.is_anonymous = is_anonymous
+            comment.site_id = 1
+            comment.submit_date = datetime.now()
+            comment.save()
+
+        commenter = random_user()
+        add_comment(commenter)
+        add_comment(commenter)
+        add_comment(random_user(), is_anonymous=True)
+        self.assertEqual(idea.members, [user, commenter])
+        with self.assertNumQueries(1):
+            self.assertEqual(idea.members, [user, commenter])
+
+        # a new comment discards the cached members
+        other = random_user()
+        add_comment(other)
+        self.assertEqual(set(idea.members), set([user, commenter, other]))
+        self.assertEqual(idea.members[0], user)
+
+
+class CounterTests(TestCase):
+    fixtures = ['state']
+
+    def setUp(self):
+        cache.clear()
+        self.state = models.State.objects.get(name='Active')
+        self.idea = models.Idea(creator=random_user(), title='Transit subsidy to Mars',
+                    text='Aliens need assistance.', state=self.state)
+        self.idea.save()
+
+    def _comment(self, user):
+        comment = MPTTComment()
+        comment.user = user
+        comment.content_object = self.idea
+        comment.comment = 'Test'
+        comment.is_public = True
+        comment.is_removed = False
+        comment.site_id = 1
+        comment.submit_date = datetime.now()
+        comment.save()
+        return comment
+
+    def _refresh(self):
+        return models.Idea.objects.get(pk=self.idea.pk)
+
+    def test_new_idea_activity(self):
+        idea = self._refresh()
+        self.assertEqual(idea.vote_count, 0)
+        self.assertEqual(idea.comment_count, 0)
+        self.assertEqual(idea.last_activity_at, idea.time)
+
+    def test_vote_count(self):
+        votes = [models.Vote.objects.create(creator=random_user(), idea=self.idea)
+                 for _ in range(3)]
+        idea = self._refresh()
+        self.assertEqual(idea.vote_count, 3)
+        self.assertEqual(idea.last_activity_at, votes[-1].time)
+
+        votes[0].delete()
+        self.assertEqual(self._refresh().vote_count, 2)
+
+    def test_comment_count(self):
+        comment = self._comment(random_user())
+        self._comment(random_user())
+        self.assertEqual(self._refresh().comment_count, 2)
+
+        comment.is_removed = True
+        comment.save()
+        self.assertEqual(self._refresh().comment_count, 1)
+
+    def test_save_keeps_counters(self):
+        idea = self._refresh()
+        models.Vote.objects.create(creator=random_user(), idea=self.idea)
+        self._comment(random_user())
+        idea.title = 'Transit subsidy to Venus'
+        idea.save()
+
+        idea = self._refresh()
+        self.assertEqual(idea.title, 'Transit subsidy to Venus')
+        self.assertEqual(idea.vote_count, 1)
+        self.assertEqual(idea.comment_count, 1)
+
+    def test_refresh_counters(self):
+        models.Vote.objects.create(creator=random_user(), idea=self.idea)
+        self._comment(random_user())
+        models.Idea.objects.filter(pk=self.idea.pk).update(
+            vote_count=0, comment_count=0, last_activity_at=None)
+
+        self.assertEqual(models.Idea.objects.refresh_counters(), 1)
+        idea = self._refresh()
+        self.assertEqual(idea.vote_count, 1)
+        self.assertEqual(idea.comment_count, 1)
+        self.assertIsNotNone(idea.last_activity_at)
+
+
+class StateRegistryTests(TestCase):
+    fixtures = ['state']
+
+    def test_lookups(self):
+        active = state_helper.get_state('Active')
+        self.assertEqual(active, models.State.objects.get(name='Active'))
+        with self.assertNumQueries(0):
+            self.assertEqual(state_helper.get_state_by_id(active.id), active)
+            self.assertEqual(state_helper.get_first_state(), active)
+            self.assertEqual([s.name for s in state_helper.get_ordered_states()],
+                             ['Active', 'Archive'])
+        self.assertRaises(models.State.DoesNotExist,
+                          state_helper.get_state, 'Missing')
+
+    def test_refreshed_on_save(self):
+        state_helper.get_state('Active')
+        review = models.State(name='Review',
+                              previous=state_helper.get_state('Archive'))
+        review.save()
+        self.assertEqual(state_helper.get_state('Review'), review)
+        self.assertEqual([s.name for s in state_helper.get_ordered_states()],
+                         ['Active', 'Archive', 'Review'])
+
+
+@patch('idea.utility.versions.cache', LocMemCache('versions', {}))
+class VersionTests(TestCase):
+    fixtures = ['state']
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bumped_by_changes(self):
+        banner = models.Banner(title='Banner', text='Banner',
+                               start_date=datetime.now().date())
+        banner.save()
+        idea = models.Idea(creator=random_user(), title='AAAA',
+                           text='AAAA Text', banner=banner,
+                           state=models.State.objects.get(name='Active'))
+        idea.save()
+        other = models.Idea(creator=random_user(), title='BBBB',
+                            text='BBBB Text',
+                            state=models.State.objects.get(name='Active'))
+        other.save()
+        scopes = (versions.IDEAS, versions.idea_scope(idea.id),
+                  versions.banner_scope(banner.id),
+                  versions.idea_scope(other.id), versions.TAGS,
+                  versions.BANNERS)
+
+        before = versions.get(*scopes)
+        models.Vote(creator=random_user(), idea=idea).save()
+        after = versions.get(*scopes)
+        self.assertEqual([True, True, True, False, False, False],
+                         [a > b for a, b in zip(after, before)])
+
+        idea.tags.add('aaa')
+        self.assertEqual([False, True, False, False, True, False],
+                         [a > b for a, b in zip(versions.get(*scopes), after)])
+
+    @patch('idea.models.cache', LocMemCache('members', {}))
+    def test_unshared_cache(self):
+        """
+        Versioned caches are skipped when the cache isn't shared between
+        processes.
+        """
+        local = {'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        memcached = {'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache'}}
+        with self.settings(IDEA_SHARED_CACHE=None, CACHES=memcached):
+            self.assertTrue(versions.shared())
+        with self.settings(IDEA_SHARED_CACHE=None, CACHES=local):
+            self.assertFalse(versions.shared())
+            idea = models.Idea(creator=random_user(), title='AAAA',
+                               text='AAAA Text',
+                               state=models.State.objects.get(name='Active'))
+            idea.save()
+            self.assertEqual([idea.creator], idea.members)
+            self.assertEqual([], models.cache._cache.keys())
+
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+from django.test import TestCase
+from django.core.cache import cache
+from django.utils import timezone
+from idea import models, notifications
+from idea.tests.utils import random_user
+from core.custom_comments.models import MPTTComment
+from mock import patch
+
+
+def add_comment(idea, user):
+    comment = MPTTComment()
+    comment.user = user
+    comment.content_object = idea
+    comment.comment = 'Test'
+    comment.is_public = True
+    comment.is_removed = False
+    comment.site_id = 1
+    comment.submit_date = datetime.now()
+    comment.save()
+    return comment
+
+
+@patch('idea.notifications.notifications_available', lambda: True)
+@patch('idea.notifications.notify')
+class NotificationTests(TestCase):
+    fixtures = ['state']
+
+    def setUp(self):
+        cache.clear()
+        self.creator = random_user()
+        self.idea = models.Idea(creator=self.creator, title='AAAA',
+                text='AAAA Text',
+                state=models.State.objects.get(name='Active'))
+        self.idea.save()
+        self.commenter = random_user()
+        add_comment(self.idea, self.commenter)
+
+    def test_sent_immediately(self, notify):
+        other = random_user()
+        notifications.comment_posted(add_comment(self.idea, other))
+        self.assertEqual(2, notify.call_count)
+        self.assertEqual(set([self.creator, self.commenter]),
+                set([call[0][2] for call in notify.call_args_list]))
+        self.assertEqual(0, models.PendingNotification.objects.count())
+
+    def test_queued(self, notify):
+        with self.settings(IDEA_QUEUE_NOTIFICATIONS=True):
+            notifications.comment_posted(add_comment(self.idea, random_user()))
+        self.assertFalse(notify.called)
+        self.assertEqual(set([self.creator.id, self.commenter.id]),
+                set(models.PendingNotification.objects.values_list(
+                    'recipient', flat=True)))
+
+    def test_send_pending_coalesces(self, notify):
+        with self.settings(IDEA_QUEUE_NOTIFICATIONS=True):
+            first = random_user()
+            notifications.comment_posted(add_comment(self.idea, first))
+            second = random_user()
+            notifications.comment_posted(add_comment(self.idea, second))
+
+        self.assertEqual(3, notifications.send_pending())
+        recipients = [call[0][2] for call in notify.call_args_list]
+        self.assertEqual(3, len(recipients))
+        self.assertEqual(set([self.creator, self.commenter, first]),
+                set(recipients))
+        self.assertEqual(0, models.PendingNotification.objects.count())
+
+    def test_claimed_before_sending(self, notify):
+        with self.settings(IDEA_QUEUE_NOTIFICATIONS=True):
+            notifications.comment_posted(add_comment(self.idea, random_user()))
+        queued = []
+        notify.side_effect = lambda *args, **kwargs: queued.append(
+            models.PendingNotification.objects.count())
+        self.assertEqual(2, notifications.send_pending())
+        self.assertEqual([0, 0], queued)
+
+    def test_digest(self, notify):
+        with self.settings(IDEA_NOTIFICATION_DIGEST_INTERVAL=30):
+            for i in range(3):
+                notifications.comment_posted(
+                    add_comment(self.idea, self.commenter))
+
+            # nothing is due until the interval has passed
+            self.assertEqual(0, notifications.send_pending())
+            self.assertFalse(notify.called)
+
+            later = timezone.now() + timedelta(minutes=31)
+            self.assertEqual(1, notifications.send_pending(now=later))
+        self.assertEqual(1, notify.call_count)
+        self.assertEqual(self.creator, notify.call_args[0][2])
+        self.assertEqual(3, notify.call_args[1]['count'])
+        self.assertEqual(0, models.PendingNotification.objects.count())
@@ -4,6 +4,7 @@ from django_webtest import WebTest
 from exam.decorators import fixture
 from exam.cases import Exam
 from django.core.urlresolvers import reverse
+from django.core.cache import cache
 from django.contrib.auth import get_user_model
 from idea.tests.utils import get_login_user, create_superuser
 
@@ -13,6 +14,7 @@ class SmokeTest(Exam, WebTest):
     fixtures = ['state']
 
     def setUp(self):
+        cache.clear()
         create_superuser()
 
     @fixture
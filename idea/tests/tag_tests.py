@@ -2,20 +2,26 @@ from django.contrib.auth import get_user_model
 from django.core.urlresolvers import reverse
 from django.conf import settings
 from django.test import TestCase
+from django.core.cache import cache
 from django.utils import unittest
 from django.test.client import RequestFactory
+from mock import patch
 from idea import models, views
 from idea.tests.utils import random_user, login, create_superuser
+from idea.utility import tag_helper
 if 'core.taggit' in settings.INSTALLED_APPS:
+    from core.taggit.models import Tag
     from core.taggit.utils import add_tags
     COLLAB_TAGS = True;
 else:
+    from taggit.models import Tag
     COLLAB_TAGS = False;
 
 class TagTest(TestCase):
     fixtures = ['state']
 
     def setUp(self):
+        cache.clear()
         create_superuser()
 
     @unittest.skipIf(COLLAB_TAGS == False, "Remove only works with collab's core.taggit")
@@ -93,3 +99,48 @@ class TagTest(TestCase):
         self.assertEqual(response.status_code, 302)
         self.assertNotIn('aaa', set([tag.slug for tag in idea.tags.all()]))
 
+    def test_ideas_with_tags(self):
+        """
+        The tag index returns only ideas carrying every requested tag.
+        """
+        user = random_user()
+        state = models.State.objects.get(name='Active')
+        ideas = []
+        for title, tags in [('AAAA', ['x', 'y', 'z']), ('BBBB', ['x', 'y']),
+                            ('CCCC', ['x', 'z']), ('DDDD', ['y', 'z'])]:
+            idea = models.Idea(creator=user, title=title, state=state)
+            idea.save()
+            idea.tags.add(*tags)
+            ideas.append(idea)
+
+        tag_ids = dict((tag.name, tag.id) for tag in Tag.objects.all())
+        self.assertEqual([ideas[0].id, ideas[1].id],
+                tag_helper.ideas_with_tags([tag_ids['x'], tag_ids['y']]))
+        self.assertEqual([ideas[0].id],
+                tag_helper.ideas_with_tags([tag_ids['x'], tag_ids['y'],
+                                            tag_ids['z']]))
+        self.assertEqual([], tag_helper.ideas_with_tags([]))
+
+        ideas = models.Idea.objects.order_by('id')
+        tags = [tag_ids['x'], tag_ids['y']]
+        self.assertEqual(['AAAA', 'BBBB'], [idea.title for idea in
+                tag_helper.filter_ideas(ideas, tags)])
+        # too many matches for the index: one subquery per tag instead
+        with patch('idea.utility.tag_helper.MAX_INDEXED_IDS', 1):
+            self.assertEqual(['AAAA', 'BBBB'], [idea.title for idea in
+                    tag_helper.filter_ideas(ideas, tags)])
+
+    @unittest.skipIf(COLLAB_TAGS == False, "Only collab's core.taggit records tag creators")
+    def test_filter_ideas_tagged_twice(self):
+        """
+        An idea given the same tag by two users is listed once.
+        """
+        state = models.State.objects.get(name='Active')
+        idea = models.Idea(creator=random_user(), title='AAAA', state=state)
+        idea.save()
+        add_tags(idea, 'AAA', None, random_user(), 'idea')
+        add_tags(idea, 'AAA', None, random_user(), 'idea')
+
+        tag = Tag.objects.get(slug='aaa')
+        self.assertEqual([idea.id], [i.id for i in tag_helper.filter_ideas(
+            models.Idea.objects.all(), [tag.id])])
@@ -1,13 +1,17 @@
+import json
 from django.core.urlresolvers import reverse
 from django.test import TestCase
-from idea import models
+from django.core.cache import cache
+from idea import models, views, vote_buffer
 from idea.tests.utils import random_user, login, create_superuser
+from mock import patch
 
 
 class VotingTests(TestCase):
     fixtures = ['state']
 
     def setUp(self):
+        cache.clear()
         create_superuser()
         self.state = models.State.objects.get(name='Active') 
 
@@ -73,3 +77,79 @@ class VotingTests(TestCase):
         idea.save()
         resp = self.client.post(reverse('idea:upvote_idea'), {'idea_id':idea.id, 'next':reverse('idea:idea_detail', args=(idea.id,))})
         self.assertIn('up', resp['Location'])
+
+    def test_toggle_vote(self):
+        """
+            toggle_vote likes and unlikes, never leaving a second vote behind.
+        """
+        user = random_user()
+        idea = models.Idea(creator=random_user(), title='Transit subsidy to Mars',
+                    text='Aliens need assistance.', state=self.state)
+        idea.save()
+
+        self.assertTrue(views.toggle_vote(idea, user))
+        self.assertEqual(models.Idea.objects.get(pk=idea.pk).vote_count, 1)
+        self.assertFalse(views.toggle_vote(idea, user))
+        self.assertEqual(len(idea.vote_set.all()), 0)
+        self.assertEqual(models.Idea.objects.get(pk=idea.pk).vote_count, 0)
+
+    def test_ajax_vote(self):
+        """
+            An AJAX vote answers with the new count and liked state.
+        """
+        idea = models.Idea(creator=random_user(), title='Transit subsidy to Mars',
+                    text='Aliens need assistance.', state=self.state)
+        idea.save()
+
+        login(self)
+        data = {'idea_id':idea.id, 'next':reverse('idea:idea_detail', args=(idea.id,))}
+        resp = self.client.post(reverse('idea:upvote_idea'), data,
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(json.loads(resp.content), {'liked': True, 'vote_count': 1})
+
+        resp = self.client.post(reverse('idea:upvote_idea'), data,
+                                HTTP_X_REQUESTED_WITH='XMLHttpRequest')
+        self.assertEqual(json.loads(resp.content), {'liked': False, 'vote_count': 0})
+
+    def test_buffered_votes(self):
+        """
+            With votes buffered, likes are applied by vote_buffer.flush, but
+            the user sees their own like straight away.
+        """
+        user = random_user()
+        idea = models.Idea(creator=random_user(), title='Transit subsidy to Mars',
+                    text='Aliens need assistance.', state=self.state)
+        idea.save()
+        other = models.Idea(creator=random_user(), title='More meetings',
+                    text='Seriously.', state=self.state)
+        other.save()
+        models.Vote(creator=user, idea=other).save()
+        models.Idea.objects.refresh_trending_scores()
+        scores = dict(models.Idea.objects.values_list('id', 'trending_score'))
+
+        with self.settings(IDEA_BUFFER_VOTES=True):
+            self.assertTrue(vote_buffer.toggle(idea, user))
+            self.assertFalse(vote_buffer.toggle(other, user))
+            self.assertEqual(len(idea.vote_set.all()), 0)
+            self.assertEqual(vote_buffer.pending_vote_count(idea, user), 1)
+            self.assertEqual(vote_buffer.pending_vote_count(other, user), 0)
+
+            ideas = [idea, other]
+            views.mark_liked(ideas, user)
+            self.assertEqual([True, False], [i.liked for i in ideas])
+
+            with patch.object(models.Idea.objects, 'record_unvote') as unvote:
+                self.assertEqual(2, vote_buffer.flush())
+            # counters are rebuilt once, not updated per withdrawn vote
+            self.assertFalse(unvote.called)
+        self.assertEqual([user], [v.creator for v in idea.vote_set.all()])
+        self.assertEqual(len(other.vote_set.all()), 0)
+        self.assertEqual(models.Idea.objects.get(pk=idea.pk).vote_count, 1)
+        self.assertEqual(models.Idea.objects.get(pk=other.pk).vote_count, 0)
+        self.assertEqual(0, models.PendingVote.objects.count())
+        # the like adds to the trending score, the withdrawn like comes off
+        self.assertAlmostEqual(scores[idea.id] + 1, models.Idea.objects.get(
+            pk=idea.pk).trending_score, places=3)
+        self.assertAlmostEqual(scores[other.id] - 1, models.Idea.objects.get(
+            pk=other.pk).trending_score, places=3)
@@ -20,3 +20,13 @@ urlpatterns = patterns(
         'room_detail', name='room_detail'),
     url(r'challenge/list/$', 'banner_list', name='banner_list'),
 )
+
+urlpatterns += patterns(
+    'idea.api',
+    url(r'^api/ideas/$', 'ideas', name='api_ideas'),
+    url(r'^api/ideas/(?P<idea_id>\d+)/$', 'idea', name='api_idea'),
+    url(r'^api/ideas/(?P<idea_id>\d+)/votes/$', 'idea_votes',
+        name='api_idea_votes'),
+    url(r'^api/banners/$', 'banners', name='api_banners'),
+    url(r'^api/tags/$', 'tags', name='api_tags'),
+)
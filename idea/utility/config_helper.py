@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.db.models import get_model
+
+from idea.utility import versions
+
+#   (version, values) last read by this process
+_local = None
+
+
+def invalidate_config():
+    """ Discard the cached config values; called whenever a Config changes. """
+    global _local
+    _local = None
+    versions.bump(versions.CONFIG)
+
+
+def sanitize(value):
+    return value.replace('<script>', '').replace('</script>', '')
+
+
+def _load():
+    Config = get_model('idea', 'Config')
+    return dict((name, sanitize(value)) for name, value
+                in Config.objects.values_list('key', 'value'))
+
+
+def get_values():
+    """
+    Return a dict of every config key and its sanitized value.  The values
+    are loaded in one query and kept both in this process and in the cache
+    until the next config change.  Without a shared cache there is no
+    hearing of changes made by other processes, so they are loaded afresh
+    every time.
+    """
+    global _local
+    if not versions.shared():
+        return _load()
+    version = versions.peek(versions.CONFIG)
+    if version is None:
+        #   Without a shared version there is no telling whether another
+        #   process changed the config, so start over from the database.
+        _local = None
+        version, = versions.get(versions.CONFIG)
+    elif _local is not None and _local[0] == version:
+        return _local[1]
+
+    key = 'idea:config:%s' % version
+    values = cache.get(key)
+    if values is None:
+        values = _load()
+        cache.set(key, values, versions.VERSION_TIMEOUT)
+    _local = (version, values)
+    return values
+
+
+def get_value(key, default=None):
+    """ Return the sanitized value of a config key, or default. """
+    return get_values().get(key, default)
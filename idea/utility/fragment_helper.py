@@ -0,0 +1,65 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.csrf import get_token
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+#   Stand-ins for the personal parts of an entry, filled in per request
+VOTE_ACTION_MARKER = '<!--idea:vote_action-->'
+IDEA_ID_MARKER = '__idea_id__'
+
+
+def _entry_key(idea, banner_votes):
+    """
+    Key an idea's entry on everything the entry shows, so any change to the
+    idea renders it afresh.
+    """
+    banner = idea.banner
+    fingerprint = repr((
+        idea.title, idea.summary, idea.vote_count, idea.comment_count,
+        idea.time.isoformat(), idea.state.name,
+        banner_votes and banner is not None and banner.is_votes,
+    ))
+    return 'idea:entry:%s:%s' % (
+        idea.id, hashlib.md5(fingerprint.encode('utf-8')).hexdigest())
+
+
+def render_idea_entries(request, ideas, next_url, banner_votes=False):
+    """
+    Set idea.entry_html on each of the given ideas to the HTML of its entry
+    in an idea list (idea/idea_entry.html).
+
+    The entries are the same for every user, so they are cached; only the
+    Like button (liked state and CSRF token) is rendered for the request and
+    spliced in.  banner_votes hides the button on ideas in banners that have
+    voting turned off.
+    """
+    actions = {}
+    for liked in (True, False):
+        actions[liked] = render_to_string('idea/vote_action.html', {
+            'idea_id': IDEA_ID_MARKER,
+            'next': next_url,
+            'liked': liked,
+            'csrf_token': get_token(request),
+        })
+
+    keys = dict((_entry_key(idea, banner_votes), idea) for idea in ideas)
+    entries = cache.get_many(keys.keys())
+    missing = {}
+    for key, idea in keys.items():
+        if key not in entries:
+            entries[key] = missing[key] = render_to_string(
+                'idea/idea_entry.html', {
+                    'idea': idea,
+                    'banner_votes': banner_votes,
+                    'vote_action': mark_safe(VOTE_ACTION_MARKER),
+                })
+        action = actions[getattr(idea, 'liked', False)].replace(
+            IDEA_ID_MARKER, str(idea.id))
+        idea.entry_html = mark_safe(
+            entries[key].replace(VOTE_ACTION_MARKER, action))
+    if missing:
+        cache.set_many(missing, getattr(settings, 'IDEA_FRAGMENT_TIMEOUT',
+                                        60 * 60 * 24))
@@ -0,0 +1,139 @@
+import base64
+import json
+
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorPage(object):
+    """
+    One page of results from a CursorPaginator.  Behaves like a list of the
+    page's objects, plus opaque next/previous cursors for the pager.
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class CursorPaginator(object):
+    """
+    Keyset ("seek") pagination over a queryset.
+
+    Rather than counting the rows and using OFFSET, each page is selected
+    with a WHERE clause on the sort columns of the row at the edge of the
+    previous page, so deep pages cost the same as the first one.  ordering
+    is a list of field names as passed to order_by(); the last one must be
+    unique (normally '-id') and none of them may be null.  The queryset may
+    also be a values() queryset, as long as it selects the ordering fields.
+    """
+
+    def __init__(self, queryset, ordering, per_page):
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page
+        self.fields = []
+        for name in ordering:
+            descending = name.startswith('-')
+            field = queryset.model._meta.get_field(name.lstrip('-'))
+            self.fields.append((field, descending))
+
+    def page(self, cursor=None):
+        if cursor:
+            direction, values = self.decode(cursor)
+        else:
+            direction, values = 'next', None
+
+        forward = direction == 'next'
+        queryset = self.queryset
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, forward))
+        if forward:
+            queryset = queryset.order_by(*self.ordering)
+        else:
+            queryset = queryset.order_by(*[self._reverse(name)
+                                           for name in self.ordering])
+        rows = [row for row in queryset[:self.per_page + 1]]
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if not forward:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if has_more or not forward:
+                next_cursor = self.encode('next', rows[-1])
+            if (has_more and not forward) or (forward and values is not None):
+                previous_cursor = self.encode('previous', rows[0])
+        return CursorPage(rows, next_cursor, previous_cursor)
+
+    def encode(self, direction, obj):
+        values = []
+        for field, descending in self.fields:
+            if isinstance(obj, dict):
+                value = obj[field.name]
+            else:
+                value = field.value_from_object(obj)
+            if hasattr(value, 'isoformat'):
+                value = value.isoformat()
+            values.append(value)
+        data = json.dumps({'d': direction, 'k': values})
+        return base64.urlsafe_b64encode(data).rstrip('=')
+
+    def decode(self, cursor):
+        try:
+            cursor = str(cursor)
+            data = json.loads(base64.urlsafe_b64decode(
+                cursor + '=' * (-len(cursor) % 4)))
+            direction = data['d']
+            values = [field.to_python(value) for (field, descending), value
+                      in zip(self.fields, data['k'])]
+        except Exception:
+            raise InvalidCursor(cursor)
+        if direction not in ('next', 'previous') or \
+                len(values) != len(self.fields) or None in values:
+            raise InvalidCursor(cursor)
+        return direction, values
+
+    def _seek(self, values, forward):
+        """
+        Build the filter selecting rows that sort after (or, going
+        backward, before) the row with the given sort values.
+        """
+        condition = None
+        equal = {}
+        for (field, descending), value in zip(self.fields, values):
+            if descending == forward:
+                lookup = '%s__lt' % field.name
+            else:
+                lookup = '%s__gt' % field.name
+            seek = Q(**dict(equal, **{lookup: value}))
+            if condition is None:
+                condition = seek
+            else:
+                condition |= seek
+            equal[field.name] = value
+        return condition
+
+    @staticmethod
+    def _reverse(name):
+        return name[1:] if name.startswith('-') else '-' + name
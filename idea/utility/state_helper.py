@@ -1,9 +1,66 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
 from idea.models import State
 
+#   States are loaded once per process and kept until one of them changes.
+_states = None
+
+
+def _registry():
+    global _states
+    if _states is None:
+        states = [state for state in State.objects.all()]
+        _states = {
+            'by_id': dict((state.id, state) for state in states),
+            'by_name': dict((state.name, state) for state in states),
+        }
+    return _states
+
+
+@receiver(post_save, sender=State)
+@receiver(post_delete, sender=State)
+def clear_states(sender=None, **kwargs):
+    """ Forget the loaded states; the next lookup reloads them. """
+    global _states
+    _states = None
+
+
+def get_state(name):
+    """ Get a state by name; raises State.DoesNotExist if there is none. """
+    try:
+        return _registry()['by_name'][name]
+    except KeyError:
+        raise State.DoesNotExist("No state named %r" % name)
+
+
+def get_state_by_id(state_id):
+    """ Get a state by id; raises State.DoesNotExist if there is none. """
+    try:
+        return _registry()['by_id'][int(state_id)]
+    except KeyError:
+        raise State.DoesNotExist("No state with id %r" % state_id)
+
+
+def get_ordered_states():
+    """
+    All states in order, following each state's previous link from the
+    state that has none.
+    """
+    states = _registry()['by_id']
+    following = dict((state.previous_id, state) for state in states.values())
+    ordered = []
+    state = following.get(None)
+    while state is not None and state not in ordered:
+        ordered.append(state)
+        state = following.get(state.id)
+    return ordered
+
+
 def get_first_state():
     """ Get the first state for an idea. """
     #return State.objects.get(previous__isnull=True)
     # previous__isnull breaks functionality if someone creates a new state
     # without a previous state set.  since we know the initial state
     # is id=1 per fixtures/state.json, use that instead.
-    return State.objects.get(id=1)
+    return get_state_by_id(1)
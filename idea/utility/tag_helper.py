@@ -0,0 +1,165 @@
+from array import array
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db.models import Count
+
+from idea.utility import versions
+
+if 'core.taggit' in settings.INSTALLED_APPS:
+    from core.taggit.models import Tag, TaggedItem
+else:
+    from taggit.models import Tag, TaggedItem
+
+TAG_CLOUD_SIZE = 25
+#   Above this many matching ideas, filter_ideas leaves the intersection to
+#   the database rather than passing it the ids (SQLite takes at most 999
+#   query parameters, and long IN lists plan badly elsewhere).
+MAX_INDEXED_IDS = 500
+
+
+def get_postings(tag_ids):
+    """
+    Return a dict mapping each tag id to the sorted array of ids of the
+    ideas carrying that tag.  Postings missing from the cache (or all of
+    them, without a shared cache) are loaded together in one query.
+    """
+    postings = {}
+    if versions.shared():
+        prefix = versions.key('idea:tag_index', versions.TAGS)
+        keys = dict(('%s:%s' % (prefix, tag_id), tag_id)
+                    for tag_id in tag_ids)
+        postings = dict((keys[key], value)
+                        for key, value in cache.get_many(keys.keys()).items())
+
+    missing = [tag_id for tag_id in tag_ids if tag_id not in postings]
+    if missing:
+        loaded = dict((tag_id, []) for tag_id in missing)
+        idea_type = ContentType.objects.get_by_natural_key('idea', 'idea')
+        for tag_id, idea_id in TaggedItem.objects.filter(
+                content_type=idea_type, tag__in=missing
+        ).values_list('tag', 'object_id'):
+            loaded[tag_id].append(idea_id)
+        timeout = getattr(settings, 'IDEA_TAG_CLOUD_TIMEOUT', 60 * 60 * 24)
+        for tag_id, idea_ids in loaded.items():
+            postings[tag_id] = array('l', sorted(set(idea_ids)))
+        if versions.shared():
+            cache.set_many(dict(('%s:%s' % (prefix, tag_id),
+                                 postings[tag_id]) for tag_id in missing),
+                           timeout)
+    return postings
+
+
+def ideas_with_tags(tag_ids):
+    """
+    Return the sorted ids of the ideas carrying every one of the given tags,
+    by intersecting the tags' postings (shortest first).
+    """
+    postings = sorted(get_postings(tag_ids).values(), key=len)
+    if not postings:
+        return []
+    idea_ids = set(postings[0])
+    for posting in postings[1:]:
+        idea_ids.intersection_update(posting)
+    return sorted(idea_ids)
+
+
+def filter_ideas(ideas, tag_ids):
+    """
+    Restrict the ideas queryset to those carrying every tag in tag_ids.
+    Several tags are resolved against the tag index when few enough ideas
+    carry all of them.  Otherwise each tag becomes a subquery rather than a
+    join, since collab can tag an idea with the same tag more than once and
+    a join would list the idea once per tagged item.
+    """
+    if len(tag_ids) > 1:
+        idea_ids = ideas_with_tags(tag_ids)
+        if len(idea_ids) <= MAX_INDEXED_IDS:
+            return ideas.filter(id__in=idea_ids)
+    if tag_ids:
+        idea_type = ContentType.objects.get_by_natural_key('idea', 'idea')
+        for tag_id in tag_ids:
+            ideas = ideas.filter(id__in=TaggedItem.objects.filter(
+                content_type=idea_type, tag=tag_id).values('object_id'))
+    return ideas
+
+
+def get_idea_tags(idea_id, user=None):
+    """
+    Return the tags on an idea, sorted by name.  Each tag gets a tag_count
+    (the number of ideas carrying it, counted for all of the tags in one
+    grouped query) and a created_by_user flag, set when user added it to
+    this idea (only collab's tagged items record who added a tag).
+    """
+    idea_type = ContentType.objects.get_by_natural_key('idea', 'idea')
+    tags = {}
+    for item in TaggedItem.objects.filter(
+            content_type=idea_type, object_id=idea_id).select_related('tag'):
+        tag = tags.setdefault(item.tag_id, item.tag)
+        created = user is not None and \
+            getattr(item, 'tag_creator_id', None) == user.id
+        tag.created_by_user = getattr(tag, 'created_by_user', False) or created
+
+    counts = {}
+    if tags:
+        #   collab can tag an idea with the same tag more than once
+        for row in TaggedItem.objects.filter(
+                content_type=idea_type, tag__in=tags.keys()
+        ).values('tag').annotate(
+                count=Count('object_id', distinct=True)).order_by():
+            counts[row['tag']] = row['count']
+    for tag_id, tag in tags.items():
+        tag.tag_count = counts.get(tag_id, 0)
+    return sorted(tags.values(), key=lambda tag: tag.name)
+
+
+def get_tag_names(idea_ids):
+    """
+    Return a dict mapping each of the given idea ids to the sorted names of
+    its tags, read in one query.
+    """
+    idea_type = ContentType.objects.get_by_natural_key('idea', 'idea')
+    names = dict((idea_id, set()) for idea_id in idea_ids)
+    for idea_id, name in TaggedItem.objects.filter(
+            content_type=idea_type, object_id__in=idea_ids
+    ).values_list('object_id', 'tag__name'):
+        #   collab can tag an idea with the same tag more than once
+        names[idea_id].add(name)
+    return dict((idea_id, sorted(tag_names))
+                for idea_id, tag_names in names.items())
+
+
+def _count_tags(ideas):
+    return Tag.objects.filter(
+        taggit_taggeditem_items__content_type__name='idea',
+        taggit_taggeditem_items__object_id__in=ideas
+    ).annotate(count=Count('taggit_taggeditem_items')
+               ).order_by('-count', 'name')[:TAG_CLOUD_SIZE]
+
+
+def get_tag_cloud(ideas, scope=None):
+    """
+    Return the most used tags among ideas, each with a count attribute.
+
+    scope names the set of ideas ('active', 'archived', 'banner:<id>') so the
+    result can be cached until the next tag change (given a shared cache);
+    leave it out for one-off sets such as tag-filtered lists.
+    """
+    if scope is None or not versions.shared():
+        return [tag for tag in _count_tags(ideas)]
+
+    key = versions.key('idea:tag_cloud:%s' % scope, versions.TAGS)
+    counts = cache.get(key)
+    if counts is None:
+        counts = [(tag.id, tag.name, tag.slug, tag.count)
+                  for tag in _count_tags(ideas)]
+        cache.set(key, counts,
+                  getattr(settings, 'IDEA_TAG_CLOUD_TIMEOUT', 60 * 60 * 24))
+
+    tags = []
+    for tag_id, name, slug, count in counts:
+        tag = Tag(id=tag_id, name=name, slug=slug)
+        tag.count = count
+        tags.append(tag)
+    return tags
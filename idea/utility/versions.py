@@ -0,0 +1,95 @@
+"""
+Version counters for the idea app's cached data.
+
+Every scope of data has a counter in the cache that is bumped whenever
+something in it changes (see the receivers at the bottom of idea.models).
+Cached values keyed on the versions of the scopes they were built from go
+stale exactly when that data changes, and are simply never read again.
+
+Scopes are IDEAS (anything shown in an idea list), TAGS (tag assignments and
+whatever decides which ideas a tag cloud covers), BANNERS, CONFIG, and one
+per idea and per banner (idea_scope(id), banner_scope(id)).
+
+The counters only work if every process of the site (each web worker, and
+the management commands) sees the same cache.  With the per-process
+LocMemCache that Django uses when CACHES isn't set, or with DummyCache, a
+bump would go unseen by the other processes, so shared() is False and the
+versioned caches are skipped altogether.  The IDEA_SHARED_CACHE setting
+overrides the guess, e.g. for a single-process site or the tests.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+IDEAS = 'ideas'
+TAGS = 'tags'
+BANNERS = 'banners'
+CONFIG = 'config'
+VERSION_TIMEOUT = 60 * 60 * 24 * 30
+
+#   Cache backends that keep their data inside each process
+LOCAL_BACKENDS = ('django.core.cache.backends.locmem.LocMemCache',
+                  'django.core.cache.backends.dummy.DummyCache')
+
+
+def shared():
+    """
+    Whether the cache is shared by all of the site's processes, so that
+    values cached under versioned keys can be trusted.
+    """
+    forced = getattr(settings, 'IDEA_SHARED_CACHE', None)
+    if forced is not None:
+        return forced
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    return backend not in LOCAL_BACKENDS
+
+
+def idea_scope(idea_id):
+    return 'idea:%s' % idea_id
+
+
+def banner_scope(banner_id):
+    return 'banner:%s' % banner_id
+
+
+def _key(scope):
+    return 'idea:version:%s' % scope
+
+
+def peek(scope):
+    """ Return the current version of scope, or None if it has none yet. """
+    return cache.get(_key(scope))
+
+
+def get(*scopes):
+    """ Return a tuple of the current versions of the given scopes. """
+    keys = [_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    versions = []
+    for key in keys:
+        version = found.get(key)
+        if version is None:
+            #   Start from the clock so an evicted version can never come
+            #   back around to a number that still has cached entries.
+            version = int(time.time())
+            cache.add(key, version, VERSION_TIMEOUT)
+        versions.append(version)
+    return tuple(versions)
+
+
+def key(prefix, *scopes):
+    """
+    Build a cache key from prefix and the current versions of scopes, e.g.
+    key('idea:tag_cloud:active', TAGS).
+    """
+    return '%s:%s' % (prefix, '.'.join([str(v) for v in get(*scopes)]))
+
+
+def bump(*scopes):
+    """ Move the given scopes to a new version. """
+    for scope in scopes:
+        try:
+            cache.incr(_key(scope))
+        except ValueError:
+            cache.set(_key(scope), int(time.time()), VERSION_TIMEOUT)
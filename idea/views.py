@@ -1,20 +1,24 @@
+import hashlib
+import json
 from datetime import date
+from functools import wraps
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.contrib.auth.models import SiteProfileNotAvailable
-from django.contrib.contenttypes.models import ContentType
-from django.core.exceptions import ObjectDoesNotExist
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from django.core.urlresolvers import reverse
-from django.db.models import Count
+from django.db import IntegrityError, transaction
+from django.db.models import get_model
 from django.http import HttpResponseRedirect, HttpResponseForbidden, HttpResponse
 from django.shortcuts import get_object_or_404, render
-from django.views.decorators.http import require_POST
-from django.db.models import Q
+from django.template.loader import render_to_string
+from django.views.decorators.http import condition, require_POST
 
+from idea import vote_buffer
 from idea.forms import IdeaForm, PrivateIdeaForm, IdeaTagForm, UpVoteForm
-from idea.models import Idea, State, Vote, Banner, Config
-from idea.utility import state_helper
+from idea.models import Idea, Vote, Banner
+from idea.utility import config_helper, fragment_helper, state_helper, tag_helper
+from idea.utility import versions
+from idea.utility.pagination import CursorPaginator, InvalidCursor
 from idea.models import UP_VOTE
 
 if 'core.taggit' in settings.INSTALLED_APPS:
@@ -34,69 +38,201 @@ def _render(req, template_name, context={}):
 
 
 def get_current_banners(additional_ids_list=None):
-    start_date = Q(start_date__lte=date.today())
-    end_date = Q(end_date__gte=date.today())|Q(end_date__isnull=True)
-    banner_filter = (start_date&end_date)
-    if additional_ids_list:
-        banner_filter = banner_filter|Q(id__in=additional_ids_list)
-    banners = Banner.objects.exclude(is_private=True).filter(banner_filter)
-    # Banners with null end_date should be at the end
-    banners = banners.extra(select={'null_end_date': 'CASE WHEN idea_banner.end_date IS NULL THEN 0 ELSE 1 END'})
-    banners = banners.order_by('-null_end_date', 'end_date')
-    return banners
+    return Banner.objects.current(additional_ids_list)
+
+
+def _current_banners(request):
+    """
+    Today's current banners as a list, shared by everything that needs them
+    while handling request.
+    """
+    if not hasattr(request, '_idea_current_banners'):
+        request._idea_current_banners = Banner.objects.current_list()
+    return request._idea_current_banners
+
+
+def _paginate(request, ideas, ordering):
+    """
+    Return the requested page of ideas, sorted by ordering.
+
+    Pages are numbered (?page_num=) unless the IDEA_CURSOR_PAGINATION setting
+    is on or the request carries a ?cursor=, in which case the page is
+    selected by keyset on the ordering columns (see CursorPaginator).
+    """
+    per_page = getattr(settings, 'IDEAS_PER_PAGE', 10)
+    if 'cursor' in request.GET or \
+            getattr(settings, 'IDEA_CURSOR_PAGINATION', False):
+        paginator = CursorPaginator(ideas, ordering, per_page)
+        try:
+            page = paginator.page(request.GET.get('cursor'))
+        except InvalidCursor:
+            page = paginator.page()
+        page.cursor_paging = True
+    else:
+        pager = Paginator(ideas.order_by(*ordering), per_page)
+        page_num = request.GET.get('page_num')
+        try:
+            page = pager.page(page_num)
+        except PageNotAnInteger:
+            page = pager.page(1)
+        except EmptyPage:
+            page = pager.page(pager.num_pages)
+        page.object_list = [idea for idea in page.object_list]
+    mark_liked(page.object_list, request.user)
+    return page
+
+
+def mark_liked(ideas, user):
+    """
+    Set idea.liked on each of the given ideas using a single query for the
+    user's votes, rather than loading every idea's voters.
+    """
+    idea_ids = [idea.id for idea in ideas]
+    liked_ids = set(Vote.objects.filter(
+        creator=user, idea__in=idea_ids
+    ).values_list('idea', flat=True))
+    pending = vote_buffer.pending_likes(user, idea_ids) \
+        if vote_buffer.enabled() else {}
+    for idea in ideas:
+        idea.liked = pending.get(idea.id, idea.id in liked_ids)
+
+
+def attach_profiles(users):
+    """
+    Set user.profile on each of the given users (None if there isn't one),
+    loading all of their profiles in a single query instead of calling
+    get_profile() per user.
+    """
+    profiles = {}
+    try:
+        app_label, model_name = settings.AUTH_PROFILE_MODULE.split('.')
+    except (AttributeError, ValueError):
+        pass
+    else:
+        profile_model = get_model(app_label, model_name)
+        if profile_model is not None:
+            for profile in profile_model._default_manager.filter(
+                    user__in=[user.id for user in users]):
+                profiles[profile.user_id] = profile
+    for user in users:
+        user.profile = profiles.get(user.id)
+        if user.profile is not None:
+            #   Later get_profile() calls reuse it
+            user._profile_cache = user.profile
 
 
 def get_banner():
-    banners = get_current_banners()
+    banners = Banner.objects.current_list()
     if banners:
         return banners[0]
     else:
         return None
 
 
+def _etag(request, scopes):
+    """
+    An ETag for a page showing the given scopes of data to request.user.
+    The page also depends on who is looking (their likes, their name in the
+    header) and on the day (which banners are current), so both are mixed
+    in with the versions of the scopes.  Nothing here touches the database
+    unless votes are buffered.
+    """
+    parts = [request.user.pk, request.get_full_path(), date.today(),
+             versions.get(*scopes)]
+    if vote_buffer.enabled():
+        parts.append(vote_buffer.latest_pending_id(request.user))
+    return hashlib.md5(repr(parts)).hexdigest()
+
+
+LIST_SCOPES = (versions.IDEAS, versions.TAGS, versions.BANNERS,
+               versions.CONFIG)
+
+
+def _detail_scopes(idea_id):
+    return (versions.idea_scope(idea_id), versions.TAGS, versions.BANNERS)
+
+
+def _challenge_scopes(banner_id):
+    #   Ideas moved out of a banner only bump their new banner, so the page
+    #   has to follow IDEAS as well.
+    return (versions.banner_scope(banner_id), versions.IDEAS,
+            versions.BANNERS, versions.TAGS)
+
+
+def list_etag(request, sort_or_state=None):
+    return _etag(request, LIST_SCOPES)
+
+
+def detail_etag(request, idea_id):
+    return _etag(request, _detail_scopes(idea_id))
+
+
+def challenge_etag(request, banner_id):
+    return _etag(request, _challenge_scopes(banner_id))
+
+
+def _conditional(etag_func):
+    """
+    Like Django's condition decorator with an ETag only, for GET and HEAD
+    requests, and only with a shared cache: the versions behind the ETags
+    can't be trusted otherwise.  There is no Last-Modified, which would be
+    the same for every user and day.
+    """
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method in ('GET', 'HEAD') and versions.shared():
+                return conditional_view(request, *args, **kwargs)
+            return view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
 @login_required
+@_conditional(list_etag)
 def list(request, sort_or_state=None):
     tag_strs = request.GET.get('tags', '').split(',')
     tag_strs = [t for t in tag_strs if t != u'']
     tag_ids = [tag.id for tag in Tag.objects.filter(slug__in=tag_strs)]
-    page_num = request.GET.get('page_num')
 
     ideas = Idea.objects.related_with_counts().exclude(banner__is_private=True)
 
     #   Tag Filter
-    for tag_id in tag_ids:
-        ideas = ideas.filter(tags__pk=tag_id)
+    ideas = tag_helper.filter_ideas(ideas, tag_ids)
 
     #   URL Filter - either archive or one of the sorts
     if sort_or_state == 'archived':
-        ideas = ideas.filter(state=State.objects.get(name='Archive')
-                             ).order_by('-vote_count')
+        ideas = ideas.filter(state=state_helper.get_state('Archive'))
+        ordering = ('-vote_count', '-id')
     else:
-        ideas = ideas.filter(state=State.objects.get(name='Active'))
+        ideas = ideas.filter(state=state_helper.get_state('Active'))
         if sort_or_state == 'vote':
-            ideas = ideas.order_by('-vote_count')
+            ordering = ('-vote_count', '-id')
         elif sort_or_state == 'recent':
-            ideas = ideas.order_by('-time')
+            ordering = ('-time', '-id')
         else:
             sort_or_state = 'trending'
-            ideas = ideas.order_by('-recent_activity')
-
-    IDEAS_PER_PAGE = getattr(settings, 'IDEAS_PER_PAGE', 10)
-    pager = Paginator(ideas, IDEAS_PER_PAGE)
-    #   Boiler plate paging -- @todo abstract this
-    try:
-        page = pager.page(page_num)
-    except PageNotAnInteger:
-        page = pager.page(1)
-    except EmptyPage:
-        page = pager.page(pager.num_pages)
-
-    #   List of tags
-    tags = Tag.objects.filter(
-        taggit_taggeditem_items__content_type__name='idea',
-        taggit_taggeditem_items__object_id__in=ideas
-    ).annotate(count=Count('taggit_taggeditem_items')
-               ).order_by('-count', 'name')[:25]
+            if Idea.objects.trending_reference() is None:
+                #   No current scores (refresh_trending_scores isn't being
+                #   run), so go by the latest activity alone.
+                ordering = ('-last_activity_at', '-id')
+            else:
+                ordering = ('-trending_score', '-last_activity_at', '-id')
+
+    page = _paginate(request, ideas, ordering)
+    fragment_helper.render_idea_entries(
+        request, page.object_list,
+        reverse('idea:idea_list', args=(sort_or_state,)))
+
+    #   List of tags; the unfiltered clouds are cached per list
+    if tag_ids:
+        tags = tag_helper.get_tag_cloud(ideas)
+    elif sort_or_state == 'archived':
+        tags = tag_helper.get_tag_cloud(ideas, 'archived')
+    else:
+        tags = tag_helper.get_tag_cloud(ideas, 'active')
 
     for tag in tags:
         if tag.slug in tag_strs:
@@ -115,16 +251,11 @@ def list(request, sort_or_state=None):
 
     banner = None
     browse_banners = None
-    current_banners = get_current_banners()
+    current_banners = _current_banners(request)
     if current_banners:
         banner = current_banners[0]
         browse_banners = current_banners[1:5]
-    try:
-        about_text = Config.objects.get(
-            key="list_about").value.replace('<script>','')\
-                                   .replace('</script>','')
-    except Config.DoesNotExist:
-        about_text = ""
+    about_text = config_helper.get_value('list_about', '')
 
     return _render(request, 'idea/list.html', {
         'sort_or_state': sort_or_state,
@@ -138,13 +269,14 @@ def list(request, sort_or_state=None):
 
 @login_required
 def banner_list(request):
-    current_banners = get_current_banners()
+    current_banners = _current_banners(request)
     past_banners = Banner.objects.exclude(is_private=True).filter(end_date__lt=date.today()).order_by('end_date')
     return _render(request, 'idea/banner_list.html', {
         'current_banners': current_banners,
         'past_banners': past_banners,
     })
 
+@transaction.commit_on_success
 def vote_up(idea, user):
     vote = Vote()
     vote.idea = idea
@@ -152,6 +284,27 @@ def vote_up(idea, user):
     vote.save()
 
 
+@transaction.commit_on_success
+def toggle_vote(idea, user):
+    """
+    Like idea for user, or take back the like if there already is one.
+    Returns True if the idea is now liked.
+
+    The insert is tried first; the unique (idea, creator) index rejects it
+    if the user already likes the idea, so concurrent or repeated clicks
+    can never leave more than one vote behind.
+    """
+    sid = transaction.savepoint()
+    try:
+        Vote.objects.create(idea=idea, creator=user, vote=UP_VOTE)
+    except IntegrityError:
+        transaction.savepoint_rollback(sid)
+        Vote.objects.filter(idea=idea, creator=user).delete()
+        return False
+    transaction.savepoint_commit(sid)
+    return True
+
+
 @require_POST
 @login_required
 def up_vote(request):
@@ -163,20 +316,30 @@ def up_vote(request):
 
         idea = Idea.objects.get(pk=idea_id)
 
-        # Up voting is idempotent
-        existing_votes = Vote.objects.filter(
-            idea=idea, creator=request.user, vote=UP_VOTE)
+        if vote_buffer.enabled():
+            liked = vote_buffer.toggle(idea, request.user)
+        else:
+            liked = toggle_vote(idea, request.user)
 
-        if not existing_votes.exists():
-            vote_up(idea, request.user)
-        elif existing_votes.exists():
-            existing_votes.delete()
+        if request.is_ajax():
+            #   Let the page update the button in place instead of
+            #   reloading everything
+            if vote_buffer.enabled():
+                vote_count = vote_buffer.pending_vote_count(idea, request.user)
+            else:
+                vote_count = Idea.objects.filter(pk=idea.pk).values_list(
+                    'vote_count', flat=True)[0]
+            return HttpResponse(json.dumps({
+                'liked': liked,
+                'vote_count': vote_count,
+            }), content_type='application/json')
 
         return HttpResponseRedirect(next_url)
 
 
 
 @login_required
+@_conditional(detail_etag)
 def detail(request, idea_id):
     """
     Detail view; idea_id must be a string containing an int.
@@ -198,39 +361,30 @@ def detail(request, idea_id):
     else:
         tag_form = IdeaTagForm()
 
-    voters = idea.voters.all()
-
-    for v in voters:
-        try:
-            v.profile = v.get_profile()
-        except (ObjectDoesNotExist, SiteProfileNotAvailable):
-            v.profile = None
-
-    idea_type = ContentType.objects.get(app_label="idea", model="idea")
-
-    tags = idea.tags.extra(select={
-        'tag_count': """
-            SELECT COUNT(*) from taggit_taggeditem tt
-            WHERE tt.tag_id = taggit_tag.id
-            AND content_type_id = %s
-        """
-    }, select_params=[idea_type.id]).order_by('name')
+    #   The page names the first ten voters and links to show_likes for
+    #   the rest, so only those ten are loaded.
+    voters = [voter for voter in idea.voters.all()[:10]]
+    attach_profiles(voters)
+    if vote_buffer.enabled():
+        support = vote_buffer.likes(idea, request.user)
+        vote_count = vote_buffer.pending_vote_count(idea, request.user)
+    else:
+        support = Vote.objects.filter(idea=idea, creator=request.user).exists()
+        vote_count = idea.vote_count
 
-    tags_created_by_user = []
+    tags = tag_helper.get_idea_tags(idea.id, request.user)
+    tags_created_by_user = [tag.name for tag in tags if tag.created_by_user]
     if COLLAB_TAGS:
         for tag in tags:
             tag.tag_url = "%s?tags=%s" % (reverse('idea:idea_list'), tag.slug)
-            for ti in tag.taggit_taggeditem_items.filter(tag_creator=request.user,
-                                                         content_type__name="idea",
-                                                         object_id=idea_id):
-                tags_created_by_user.append(tag.name)
 
     return _render(request, 'idea/detail.html', {
         'idea': idea,  # title, body, user name, user photo, time
-        'support': request.user in voters,
+        'support': support,
         'tags': tags,
         'tags_created_by_user': tags_created_by_user,
         'voters': voters,
+        'vote_count': vote_count,
         'tag_form': tag_form
     })
 
@@ -239,22 +393,33 @@ def detail(request, idea_id):
 def show_likes(request, idea_id):
     """
     Detail view; idea_id must be a string containing an int.
+
+    Voters are listed most recent first, a page at a time (?cursor=).  With
+    ?format=json the page comes back as an HTML fragment plus the cursor of
+    the next page, for loading more as the user scrolls.
     """
     idea = get_object_or_404(Idea, pk=int(idea_id))
-    voters = idea.voters.all()
-
-    for v in voters:
-        try:
-            v.profile = v.get_profile()
-        except (ObjectDoesNotExist, SiteProfileNotAvailable):
-            v.profile = None
-
-    idea_type = ContentType.objects.get(app_label="idea", model="idea")
+    votes = Vote.objects.filter(idea=idea).select_related('creator')
+    paginator = CursorPaginator(
+        votes, ('-time', '-id'), getattr(settings, 'IDEA_VOTERS_PER_PAGE', 50))
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        page = paginator.page()
+    voters = [vote.creator for vote in page]
+    attach_profiles(voters)
+
+    if request.GET.get('format') == 'json':
+        return HttpResponse(json.dumps({
+            'html': render_to_string('idea/voters.html', {'voters': voters}),
+            'next_cursor': page.next_cursor,
+        }), content_type='application/json')
 
     return _render(request, 'idea/show_likes.html', {
         'idea': idea,  # title, body, user name, user photo, time
-        'support': request.user in voters,
-        'voters': voters
+        'support': vote_buffer.likes(idea, request.user),
+        'voters': voters,
+        'page': page,
     })
 
 
@@ -299,7 +464,7 @@ def add_idea(request, banner_id=None):
             return HttpResponse('Idea is archived', status=403)
     else:
         idea_title = request.GET.get('idea_title', '')
-        current_banners = get_current_banners()
+        current_banners = _current_banners(request)
         form_initial = {'title': idea_title, 'banner': None}
         banner = None
         if banner_id:
@@ -308,7 +473,7 @@ def add_idea(request, banner_id=None):
             form_initial['banner'] = banner.id
             form = PrivateIdeaForm(initial=form_initial)
             form.fields["banner"].queryset = Banner.objects.filter(id=banner_id)
-        elif current_banners.count() == 0:
+        elif not current_banners:
             form = IdeaForm(initial=form_initial)
             form.fields.pop('banner')
             form.fields.pop('challenge-checkbox')
@@ -321,7 +486,7 @@ def add_idea(request, banner_id=None):
                     form_initial['challenge-checkbox'] = "on"
 
             form = IdeaForm(initial=form_initial)
-            form.fields["banner"].queryset = current_banners
+            form.fields["banner"].queryset = get_current_banners()
         return _render(request, 'idea/add.html', {
             'form': form, 'banner': banner,
         })
@@ -400,6 +565,7 @@ def room_detail(request, slug):
     return banner_detail(request, banner=banner)
 
 @login_required
+@_conditional(challenge_etag)
 def challenge_detail(request, banner_id):
     """
     Challenge detail view; banner_id must be a string containing an int.
@@ -411,38 +577,29 @@ def banner_detail(request, banner):
     """
     Banner detail view; banner must be a Banner object.
     """
-    is_current_banner = True if banner in get_current_banners() else False
+    is_current_banner = True if banner in _current_banners(request) else False
 
     tag_strs = request.GET.get('tags', '').split(',')
     tag_strs = [t for t in tag_strs if t != u'']
     tag_ids = [tag.id for tag in Tag.objects.filter(slug__in=tag_strs)]
-    page_num = request.GET.get('page_num')
 
     ideas = Idea.objects.related_with_counts().filter(
         banner=banner,
-        state=State.objects.get(name='Active')
-    ).order_by('-time')
+        state=state_helper.get_state('Active')
+    )
 
     #   Tag Filter
-    for tag_id in tag_ids:
-        ideas = ideas.filter(tags__pk=tag_id).distinct()
+    ideas = tag_helper.filter_ideas(ideas, tag_ids)
 
-    IDEAS_PER_PAGE = getattr(settings, 'IDEAS_PER_PAGE', 10)
-    pager = Paginator(ideas, IDEAS_PER_PAGE)
-    #   Boiler plate paging -- @todo abstract this
-    try:
-        page = pager.page(page_num)
-    except PageNotAnInteger:
-        page = pager.page(1)
-    except EmptyPage:
-        page = pager.page(pager.num_pages)
+    page = _paginate(request, ideas, ('-time', '-id'))
+    fragment_helper.render_idea_entries(
+        request, page.object_list, request.path, banner_votes=True)
 
     #   List of tags that are associated with an idea in the banner list
-    tags = Tag.objects.filter(
-        taggit_taggeditem_items__content_type__name='idea',
-        taggit_taggeditem_items__object_id__in=ideas
-    ).annotate(count=Count('taggit_taggeditem_items')
-               ).order_by('-count', 'name')[:25]
+    if tag_ids:
+        tags = tag_helper.get_tag_cloud(ideas)
+    else:
+        tags = tag_helper.get_tag_cloud(ideas, 'banner:%s' % banner.id)
 
     for tag in tags:
         if tag.slug in tag_strs:
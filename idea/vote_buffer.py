@@ -0,0 +1,131 @@
+"""
+Write-behind buffering of likes.
+
+With the IDEA_BUFFER_VOTES setting on, a like or unlike is only appended to
+the PendingVote table, so voting stays cheap during spikes (such as the
+launch of a new challenge).  The flush_pending_votes management command
+applies the buffered votes to the Vote table in bulk and then brings the
+ideas' counters up to date.  Until then a user's own pending votes are
+merged in wherever the page shows whether they like an idea.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from idea.models import Idea, PendingVote, Vote
+from idea.utility import versions
+
+
+def enabled():
+    return getattr(settings, 'IDEA_BUFFER_VOTES', False)
+
+
+def pending_likes(user, idea_ids):
+    """
+    Return a dict mapping the ids of the ideas user has unflushed votes on
+    to whether the latest of them is a like.
+    """
+    likes = {}
+    for idea_id, liked in PendingVote.objects.filter(
+            creator=user, idea__in=idea_ids
+    ).order_by('id').values_list('idea', 'liked'):
+        likes[idea_id] = liked
+    return likes
+
+
+def latest_pending_id(user):
+    """
+    The id of user's latest unflushed vote, or None; it changes whenever
+    user votes, so pages that show their likes can be validated with it.
+    """
+    return PendingVote.objects.filter(creator=user).aggregate(
+        latest=Max('id'))['latest']
+
+
+def likes(idea, user):
+    """ Whether user likes idea, counting the pending votes. """
+    liked = pending_likes(user, [idea.id]).get(idea.id)
+    if liked is None:
+        liked = Vote.objects.filter(idea=idea, creator=user).exists()
+    return liked
+
+
+def toggle(idea, user):
+    """
+    Buffer a like of idea by user, or an unlike if they already like it.
+    Returns True if the idea is now liked.
+    """
+    liked = not likes(idea, user)
+    PendingVote.objects.create(idea=idea, creator=user, liked=liked)
+    return liked
+
+
+def pending_vote_count(idea, user):
+    """
+    The idea's vote_count, adjusted for user's own pending vote on it.
+    Other users' pending votes are left out until they are flushed, so the
+    count never costs more than a look at user's own votes.
+    """
+    vote_count = Idea.objects.filter(pk=idea.pk).values_list(
+        'vote_count', flat=True)[0]
+    liked = pending_likes(user, [idea.id]).get(idea.id)
+    if liked is not None:
+        voted = Vote.objects.filter(idea=idea, creator=user).exists()
+        vote_count += int(liked) - int(voted)
+    return vote_count
+
+
+def flush(batch_size=1000):
+    """
+    Apply the buffered votes, oldest first, batch_size at a time: only the
+    latest vote of each user on an idea counts.  The new votes are inserted
+    with one bulk insert and the withdrawn ones removed with one delete,
+    then the counters and trending scores of the ideas involved are brought
+    up to date, all in the same transaction.  The batch stays locked until
+    that transaction commits, so concurrent flushes never apply the same
+    votes twice.  Returns the number of buffered votes processed.
+    """
+    flushed = 0
+    while True:
+        with transaction.commit_on_success():
+            batch = [pending for pending in PendingVote.objects.
+                     select_for_update().order_by('id')[:batch_size]]
+            if not batch:
+                return flushed
+
+            wanted = {}
+            for pending in batch:
+                wanted[(pending.idea_id, pending.creator_id)] = pending
+            idea_ids = set([idea_id for idea_id, creator_id in wanted])
+            creator_ids = set([creator_id for idea_id, creator_id in wanted])
+
+            existing = {}
+            for vote_id, idea_id, creator_id, time in Vote.objects.filter(
+                    idea__in=idea_ids, creator__in=creator_ids
+            ).values_list('id', 'idea', 'creator', 'time'):
+                existing[(idea_id, creator_id)] = (vote_id, time)
+
+            added = [
+                Vote(idea_id=idea_id, creator_id=creator_id, time=pending.time)
+                for (idea_id, creator_id), pending in wanted.items()
+                if pending.liked and (idea_id, creator_id) not in existing]
+            Vote.objects.bulk_create(added)
+            withdrawn = [(key[0], existing[key])
+                         for key, pending in wanted.items()
+                         if not pending.liked and key in existing]
+            if withdrawn:
+                #   A single DELETE without the per-vote signals; the
+                #   counters and scores are brought up to date below.
+                Vote.objects.filter(id__in=[
+                    vote_id for idea_id, (vote_id, time) in withdrawn
+                ])._raw_delete(Vote.objects.db)
+            PendingVote.objects.filter(
+                id__in=[pending.id for pending in batch]).delete()
+
+            updated, scopes = Idea.objects.update_counters(idea_ids)
+            Idea.objects.record_trending(
+                [(vote.idea_id, 1.0, vote.time) for vote in added] +
+                [(idea_id, -1.0, time)
+                 for idea_id, (vote_id, time) in withdrawn])
+        versions.bump(*scopes)
+        flushed += len(batch)